@@ -0,0 +1,25 @@
+import numpy as np
+
+
+# Каждая функция получает цифры (выборки × цифры), флаги точного распознавания той же формы
+# и степени десяти для сборки числа; возвращает значение без учёта десятичной точки
+
+def majority(digits, exact, powers):
+    # Для каждой цифры берётся самое частое значение в интервале
+    counts = (digits[..., None] == np.arange(10)).sum(axis=0)
+    return int(counts.argmax(axis=-1) @ powers)
+
+
+def median(digits, exact, powers):
+    return float(np.median(digits @ powers))
+
+
+def last(digits, exact, powers):
+    # Последнее показание, совпавшее с предыдущим (оба распознаны без ошибок)
+    valid = exact.all(axis=1)
+    stable = np.flatnonzero(np.all(digits[1:] == digits[:-1], axis=1) & valid[1:] & valid[:-1])
+    row = digits[stable[-1] + 1] if stable.size else digits[-1]
+    return int(row @ powers)
+
+
+AGGREGATIONS = {'majority': majority, 'median': median, 'last': last}
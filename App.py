@@ -1,18 +1,168 @@
 import configparser
+import os
 
-from VideoScanner import VideoScanner
+from Layout import Layout
+from Checkpoint import Checkpoint
+import Exporters
+
+# Модули сканеров (и вместе с ними OpenCV) загружаются только тогда, когда нужны:
+# экспорт уже полученных значений обходится без них
 
 class App:
-    def __init__(self):
-        self.config = configparser.ConfigParser()
-        self.config.read("config.ini")
-        self._video = VideoScanner(self.config)
+    def __init__(self, config=None, resume=False, data=None):
+        if config is None:
+            config = configparser.ConfigParser()
+            config.read("config.ini")
+        self.config = config
+        self.sink = None
+        self.log = None
+
+        if data is not None:
+            # Только экспорт уже полученных значений в другой формат
+            self.data = data
+            self._video = None
+            return
+
+        self.layoutPath = self.config['Video'].get('layoutPath', '')
+        self.store = None
+        if self.config.get('LayoutStore', 'path', fallback=''):
+            from LayoutStore import LayoutStore
+            self.store = LayoutStore.fromConfig(self.config)
+        live = bool(self.config['Video'].get('liveSource', ''))
+        autoLayout = self.config['Video'].get('autoLayout', 'no')
+        self.reviewing = False
+
+        layout = None
+        if self.layoutPath and os.path.exists(self.layoutPath):
+            layout = Layout.load(self.layoutPath)
+        if live and layout is None:
+            # Разметку для камеры не найти ни в хранилище, ни по videoPath, ни вручную
+            raise ValueError(f"liveSource needs a layout file: [Video] layoutPath '{self.layoutPath}' does not exist")
+
+        checkpointExists = os.path.exists(self.config['Video']['videoPath'] + '.ckpt')
+        if layout is None and not (resume and checkpointExists):
+            if self.store is not None:
+                # Разметка той же камеры из хранилища, выровненная по первому кадру
+                layout = self.store.find(self.firstFrame())
+            if layout is None and autoLayout != 'no':
+                from AutoLayout import AutoLayout
+                layout = AutoLayout.fromConfig(self.config).detect()
+                if not layout.digits:
+                    layout = None
+                elif autoLayout == 'review':
+                    # Найденная разметка показывается в окне сканирования, где её можно поправить (клавиша f)
+                    from VideoScanner import VideoScanner
+                    self._video = VideoScanner(self.config)
+                    layout.apply(self._video)
+                    self.reviewing = True
+                    layout = None
+                elif self.store is not None:
+                    self.store.add(layout, self.firstFrame())
+            if layout is not None and self.layoutPath:
+                layout.save(self.layoutPath)
+        hasLayout = layout is not None
+
+        self.checkpoint = Checkpoint(self.config['Video']['videoPath'],
+                                     self.config.getint('Scan', 'checkpointInterval', fallback=0))
+        self.resumed = self.checkpoint.load() if resume else None
+
+        self.interactive = self.reviewing or not hasLayout
+        self.parallel = False
+        self.live = False
+
+        if self.reviewing:
+            pass
+        elif self.resumed is not None:
+            # Продолжение с контрольной точки: разметка берётся из неё, отрезки не делятся между процессами
+            layout = Layout.fromDict(self.resumed['layout'])
+            if hasLayout:
+                from HeadlessScanner import HeadlessScanner
+                self._video = HeadlessScanner(self.config, layout, startSec=self.resumed['position'])
+            else:
+                from VideoScanner import VideoScanner
+                self._video = VideoScanner(self.config)
+                layout.apply(self._video)
+                self._video.currentSecScan = self.resumed['position']
+            print(f"Resuming from {self.resumed['position']}")
+        elif live:
+            # Камера или поток сканируются только по готовой разметке
+            from LiveScanner import LiveScanner
+            self._video = LiveScanner(self.config, layout)
+            self.live = True
+        elif hasLayout:
+            if self.config.getint('Scan', 'workers', fallback=1) > 1:
+                from ParallelScanner import ParallelScanner
+                self._video = ParallelScanner(self.config, layout)
+                self.parallel = True
+            else:
+                from HeadlessScanner import HeadlessScanner
+                self._video = HeadlessScanner(self.config, layout)
+        else:
+            from VideoScanner import VideoScanner
+            self._video = VideoScanner(self.config)
         self.data = {}
 
     def run(self):
-        self._video.set()
-        self.data = self._video.scan()
-        self.export()
+        if self.interactive:
+            if self.resumed is None and not self.reviewing:
+                self._video.set()
+                self.saveLayout()
+            else:
+                self._video.showFrame()
+
+        # Значения пишутся в файл по мере сканирования, если формат это позволяет
+        # (процессы ParallelScanner возвращают результаты целиком, они экспортируются после)
+        if not self.parallel:
+            # При продолжении файл экспорта дописывается с места, сохранённого в контрольной точке
+            resume = self.resumed['sink'] if self.resumed is not None else None
+            self.sink = Exporters.createSink(self.config, len(self._video.digits), resume)
+
+            if self.sink is None and not self.live and (self.checkpoint.interval > 0 or resume is not None):
+                # Формат без потоковой записи: до экспорта значения пишутся в журнал рядом с видео,
+                # откуда после сканирования читаются обратно
+                self.log = Exporters.CSVSink(self.checkpoint.logName,
+                                             self.config.getint('Export', 'flushEvery', fallback=100), resume)
+                self.sink = self.log
+            self._video.sink = self.sink
+
+            if self.checkpoint.interval > 0 and not self.live:
+                self._video.checkpoint = self.checkpoint
+
+        # Поток экспорта закрывается и при ошибке или прерывании сканирования, чтобы не потерять
+        # значения после последнего сброса на диск
+        try:
+            self.data = self._video.scan()
+        finally:
+            if self.sink is not None:
+                self.sink.close()
+
+        if self.log is not None:
+            self.data = Exporters.readResults(self.log.path)
+
+        if self.interactive:
+            self.saveLayout()
+
+        if self.sink is None or self.log is not None:
+            self.export()
+
+        self.checkpoint.remove()
+        if self.log is not None:
+            os.remove(self.log.path)
+
+    def firstFrame(self):
+        from FrameSource import SeekingFrameSource
+
+        source = SeekingFrameSource(self.config['Video']['videoPath'])
+        _, frame = source.read(source.frameIndex(int(self.config['Video']['startSec'])))
+        source.release()
+        return frame
+
+    def saveLayout(self):
+        layout = Layout.fromScanner(self._video)
+        if self.layoutPath:
+            layout.save(self.layoutPath)
+        if self.store is not None and layout.digits:
+            self.store.add(layout, self.firstFrame())
 
     def export(self):
         exportFormat = self.config['Export']['exportFormat']
@@ -31,10 +181,21 @@ class App:
             self.ExportAsExcel()
         elif exportFormat == 'Graph':
             self.ExportAsGraph()
+        elif exportFormat == 'Spans':
+            self.ExportAsSpans()
+        elif exportFormat == 'CSV':
+            self.ExportAsCSV()
+        elif exportFormat == 'Columnar':
+            self.ExportAsColumnar()
+
+    def _exportToSink(self, sinkClass):
+        with sinkClass(self.config['Export']['exportFileName'],
+                       self.config.getint('Export', 'flushEvery', fallback=100)) as sink:
+            for sec, value in self.data.items():
+                sink.write(sec, value)
 
     def ExportAsRawTXT(self):
-        with open(self.config['Export']['exportFileName']+'.txt', 'w', encoding='utf-8') as file:
-            file.write('\n'.join(map(str, self.data.values())))
+        self._exportToSink(Exporters.RawTXTSink)
 
     def ExportAsPythonList(self):
         with open(self.config['Export']['exportFileName']+'.txt', 'w', encoding='utf-8') as file:
@@ -42,31 +203,34 @@ class App:
 
     def ExportAsPythonDict(self):
         with open(self.config['Export']['exportFileName']+'.txt', 'w', encoding='utf-8') as file:
-            file.write(str(self.data))
+            file.write(str(dict(self.data)))
 
     def ExportAsJSON(self):
-        import json
-        with open(self.config['Export']['exportFileName']+'.json', 'w', encoding='utf-8') as file:
-            file.write(json.dumps(self.data))
+        self._exportToSink(Exporters.JSONSink)
 
-    def ExportAsNumpyArray(self):
-        import numpy as np
-        np.save(self.config['Export']['exportFileName'], np.array(list(self.data.values())))
+    def ExportAsCSV(self):
+        self._exportToSink(Exporters.CSVSink)
 
-    def ExportAsExcel(self):
-        import xlsxwriter
+    def ExportAsSpans(self):
+        import json
+        from Spans import Spans
+
+        spans = self.data
+        if not isinstance(spans, Spans):
+            spans = Spans(self.config.getfloat('Scan', 'outputInterval', fallback=1))
+            spans.update(self.data)
 
-        workbook = xlsxwriter.Workbook(self.config['Export']['exportFileName']+'.xlsx')
-        worksheet = workbook.add_worksheet()
+        with open(self.config['Export']['exportFileName']+'.spans.json', 'w', encoding='utf-8') as file:
+            file.write(json.dumps({'step': spans.step, 'spans': spans.spans()}))
 
-        worksheet.write(0, 1, 'Секунда')
-        worksheet.write(0, 2, 'Значение')
+    def ExportAsNumpyArray(self):
+        self._exportToSink(Exporters.NumpySink)
 
-        for i, sec in enumerate(self.data):
-            worksheet.write(i+1, 1, sec)
-            worksheet.write(i+1, 2, self.data[sec])
+    def ExportAsExcel(self):
+        self._exportToSink(Exporters.ExcelSink)
 
-        workbook.close()
+    def ExportAsColumnar(self):
+        self._exportToSink(Exporters.ColumnarSink)
 
     def ExportAsGraph(self):
         import matplotlib.pyplot as plt
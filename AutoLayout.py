@@ -0,0 +1,148 @@
+import cv2
+import numpy as np
+
+from FrameSource import StreamingFrameSource
+from Layout import Layout
+from VideoScanner import SN
+
+ROTATIONS = (cv2.ROTATE_90_COUNTERCLOCKWISE, cv2.ROTATE_180, cv2.ROTATE_90_CLOCKWISE)
+
+
+class AutoLayout:
+    # Разметка без ручной настройки. Пиксели сегментов меняют яркость вместе с показаниями,
+    # поэтому по выборке кадров строится карта разброса яркости каждого пикселя; на ней выделяются
+    # вытянутые пятна - сегменты, которые группируются в цифры по горизонтальным сегментам
+    # и получают имена по положению. Сегменты, не менявшиеся в выборке, достраиваются по геометрии
+    # остальных цифр; цифры, не менявшиеся совсем, не находятся.
+    # rotate - поворот индикатора в кадре, как в VideoScanner (число поворотов против часовой стрелки)
+
+    def __init__(self, path, sampleFrames=100, startSec=0, rotate=0, minArea=20):
+        self.path = path
+        self.sampleFrames = sampleFrames
+        self.startSec = startSec
+        self.rotate = rotate
+        self.minArea = minArea
+
+    @staticmethod
+    def fromConfig(config):
+        return AutoLayout(config['Video']['videoPath'],
+                          config.getint('AutoLayout', 'sampleFrames', fallback=100),
+                          int(config['Video']['startSec']),
+                          config.getint('AutoLayout', 'rotate', fallback=0),
+                          config.getint('AutoLayout', 'minArea', fallback=20))
+
+    def variance(self):
+        # Среднеквадратичное отклонение яркости каждого пикселя по кадрам, равномерно взятым из видео
+        source = StreamingFrameSource(self.path)
+        first = source.frameIndex(self.startSec)
+        indices = np.unique(np.linspace(first, source.totalFrameCount - 1, self.sampleFrames).astype(int))
+
+        total = totalSquares = None
+        count = 0
+        for frameIndex in indices:
+            ret, frame = source.read(int(frameIndex))
+            if not ret:
+                break
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY).astype(np.float64)
+            if total is None:
+                total = np.zeros_like(gray)
+                totalSquares = np.zeros_like(gray)
+            total += gray
+            totalSquares += gray * gray
+            count += 1
+        source.release()
+
+        if not count:
+            raise ValueError(f'{self.path}: no frames to analyze')
+        mean = total / count
+        return np.sqrt(np.maximum(totalSquares / count - mean * mean, 0))
+
+    def blobs(self, deviation):
+        # Пятна (центр x, центр y, горизонтальное ли, длина) на карте разброса
+        scaled = cv2.normalize(deviation, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+        _, mask = cv2.threshold(scaled, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=4)
+
+        blobs = []
+        for (x, y, w, h, area), (cx, cy) in zip(stats[1:], centroids[1:]):
+            # Сегмент - вытянутое пятно; соприкоснувшиеся сегменты и шум отбрасываются
+            if area < self.minArea or max(w, h) < 1.5 * min(w, h):
+                continue
+            blobs.append((cx, cy, w >= h, max(w, h)))
+        return blobs
+
+    @staticmethod
+    def _levels(values, gap):
+        # Средние скоплений отсортированных значений, соседние в скоплении ближе gap
+        groups = []
+        for value in sorted(values):
+            if groups and value - groups[-1][-1] < gap:
+                groups[-1].append(value)
+            else:
+                groups.append([value])
+        return [float(np.mean(g)) for g in groups]
+
+    def group(self, blobs):
+        # Цифры слева направо: список пар (имя сегмента, позиция) в повёрнутом кадре
+        horizontal = [b for b in blobs if b[2]]
+        vertical = [b for b in blobs if not b[2]]
+        if not horizontal:
+            return []
+        length = float(np.median([b[3] for b in horizontal]))
+
+        # Центр каждой цифры - скопление горизонтальных сегментов по x
+        centers = self._levels([b[0] for b in horizontal], length / 2)
+
+        # Уровни U, M, B общие для всех цифр: оценка по крайним сегментам, уточнённая по найденным
+        top = min([b[1] for b in horizontal] + [b[1] - length / 2 for b in vertical])
+        bottom = max([b[1] for b in horizontal] + [b[1] + length / 2 for b in vertical])
+        rows = [top, (top + bottom) / 2, bottom]
+        for i, row in enumerate(rows):
+            near = [b[1] for b in horizontal if abs(b[1] - row) < length / 3]
+            if near:
+                rows[i] = float(np.mean(near))
+        upper, lower = (rows[0] + rows[1]) / 2, (rows[1] + rows[2]) / 2
+
+        halfWidth = length * 0.6
+        offsets = [abs(b[0] - min(centers, key=lambda c: abs(c - b[0]))) for b in vertical]
+        if offsets:
+            halfWidth = float(np.median(offsets))
+
+        digits = []
+        for center in centers:
+            expected = {
+                SN.U: (center, rows[0]), SN.UL: (center - halfWidth, upper), SN.UR: (center + halfWidth, upper),
+                SN.M: (center, rows[1]), SN.BL: (center - halfWidth, lower), SN.BR: (center + halfWidth, lower),
+                SN.B: (center, rows[2])
+            }
+            digit = []
+            for name in SN.order():
+                isHorizontal = name in (SN.U, SN.M, SN.B)
+                ex, ey = expected[name]
+                candidates = [(abs(b[0] - ex) + abs(b[1] - ey), b) for b in blobs if b[2] == isHorizontal]
+                distance, best = min(candidates, key=lambda c: c[0], default=(None, None))
+                digit.append((name, (best[0], best[1]) if best is not None and distance < length / 2 else (ex, ey)))
+            digits.append(digit)
+        return digits
+
+    def _toSource(self, pos, shape):
+        # Координаты в повёрнутом кадре → координаты исходного кадра (shape - размер исходного)
+        x, y = pos
+        height, width = shape
+        if self.rotate == 1:
+            x, y = width - 1 - y, x
+        elif self.rotate == 2:
+            x, y = width - 1 - x, height - 1 - y
+        elif self.rotate == 3:
+            x, y = y, height - 1 - x
+        return int(round(x)), int(round(y))
+
+    def detect(self):
+        deviation = self.variance()
+        rotated = cv2.rotate(deviation, ROTATIONS[self.rotate - 1]) if self.rotate else deviation
+
+        digits = [[(name, self._toSource(pos, deviation.shape)) for name, pos in d]
+                  for d in self.group(self.blobs(rotated))]
+        print(f'AutoLayout: {len(digits)} digits found')
+        return Layout(None, self.rotate, digits)
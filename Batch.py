@@ -0,0 +1,118 @@
+import configparser
+import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from App import App
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+
+def videoHash(path):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _runExperiment(rawConfig):
+    config = configparser.ConfigParser()
+    config.read_dict(rawConfig)
+    App(config, resume=True).run()
+    return config['Export']['exportFileName']
+
+
+class Batch:
+    # Обработка всех экспериментов из папки по сохранённым рядом с видео разметкам
+
+    def __init__(self, config):
+        self.config = config
+        self.root = config.get('Batch', 'experimentsDir', fallback='Experiments')
+        self.workers = config.getint('Batch', 'workers', fallback=os.cpu_count())
+        self.manifestPath = os.path.join(self.root, 'manifest.json')
+
+    def discover(self):
+        experiments = []
+        for directory in sorted(glob.glob(os.path.join(self.root, 'E-*'))):
+            videos = sorted(f for f in os.listdir(directory) if f.lower().endswith(VIDEO_EXTENSIONS))
+            layoutPath = os.path.join(directory, 'layout.json')
+
+            if not videos:
+                continue
+            if not os.path.exists(layoutPath):
+                print(f'{directory}: no layout.json, skipped')
+                continue
+
+            experiments.append((os.path.join(directory, videos[0]), layoutPath))
+        return experiments
+
+    def loadManifest(self):
+        if not os.path.exists(self.manifestPath):
+            return {}
+        with open(self.manifestPath, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def saveManifest(self, manifest):
+        with open(self.manifestPath, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=2)
+
+    def experimentConfig(self, videoPath, layoutPath):
+        config = configparser.ConfigParser()
+        config.read_dict(self.config)
+
+        config['Video']['videoPath'] = videoPath
+        config['Video']['layoutPath'] = layoutPath
+        config['Export']['exportFileName'] = os.path.join(
+            os.path.dirname(videoPath), os.path.basename(self.config['Export']['exportFileName']))
+
+        # Параллельность на уровне экспериментов, а не отрезков одного видео
+        if not config.has_section('Scan'):
+            config.add_section('Scan')
+        config['Scan']['workers'] = '1'
+
+        return {section: dict(config[section]) for section in config.sections()}
+
+    def run(self):
+        manifest = self.loadManifest()
+        # Хеш обработанного видео берётся из манифеста, если файл не менялся (тот же путь, размер
+        # и время изменения); целиком хешируются только новые и изменённые видео
+        known = {(entry['video'], entry.get('size'), entry.get('mtime')): key for key, entry in manifest.items()}
+
+        pending = {}
+        for videoPath, layoutPath in self.discover():
+            stat = os.stat(videoPath)
+            key = known.get((videoPath, stat.st_size, stat.st_mtime)) or videoHash(videoPath)
+            if key in manifest:
+                if (manifest[key].get('size'), manifest[key].get('mtime')) != (stat.st_size, stat.st_mtime):
+                    # Видео переименовано, скопировано или записано манифестом без размера
+                    manifest[key].update(video=videoPath, size=stat.st_size, mtime=stat.st_mtime)
+                    self.saveManifest(manifest)
+                print(f'{videoPath}: already done, skipped')
+                continue
+            pending[key] = (videoPath, self.experimentConfig(videoPath, layoutPath), stat)
+
+        with ProcessPoolExecutor(self.workers) as pool:
+            futures = {pool.submit(_runExperiment, rawConfig): key for key, (_, rawConfig, _) in pending.items()}
+
+            for future in as_completed(futures):
+                key = futures[future]
+                videoPath, _, stat = pending[key]
+                try:
+                    exportFileName = future.result()
+                except Exception as e:
+                    print(f'{videoPath}: failed ({e!r})')
+                    continue
+
+                manifest[key] = {'video': videoPath, 'export': exportFileName, 'size': stat.st_size,
+                                 'mtime': stat.st_mtime}
+                self.saveManifest(manifest)
+                print(f'{videoPath}: done')
+
+
+if __name__ == '__main__':
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    Batch(config).run()
@@ -0,0 +1,225 @@
+import argparse
+import configparser
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from FrameSource import SeekingFrameSource, StreamingFrameSource
+from HeadlessScanner import HeadlessScanner
+from Layout import Layout
+from Profiler import Profiler
+from VideoScanner import Digit, Interrupt, SN, Segment
+
+
+def renderSyntheticClip(path, seconds=60, fps=30, size=(1280, 720), fourcc='mp4v'):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+
+    for i in range(seconds * fps):
+        frame = background.copy()
+        x = (i * 7) % (size[0] - 100)
+        cv2.rectangle(frame, (x, 100), (x + 100, 200), (255, 255, 255), -1)
+        cv2.putText(frame, str(i), (50, size[1] - 50), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+        writer.write(frame)
+
+    writer.release()
+
+
+def renderSevenSegmentClip(path, seconds=30, fps=30, size=(1280, 720), digitCount=4, fourcc='mp4v',
+                           noise=0, drift=0, holdSec=0.7, seed=0):
+    # Видео с индикатором из digitCount цифр, нарисованных по геометрии Digit.segmentsPositions.
+    # Показание меняется каждые holdSec секунд, яркость кадра линейно падает на долю drift.
+    # Возвращает разметку и известные показания для каждого кадра.
+
+    block = min(size[1] // 15, size[0] // (6 * digitCount + 2))
+    digitWidth = block * 5
+    origin = np.array([(size[0] - round(1.2 * digitWidth * digitCount)) // 2, (size[1] - 9 * block) // 2])
+    rectangles = Digit.segmentsPositions(block)
+
+    offColor = round(Segment.offColor / 3)
+    onColor = round(Segment.onColor / 3)
+
+    digits = []
+    for i in range(digitCount):
+        anchor = origin + (round(digitWidth * i * 1.2), 0)
+        digits.append([(name, tuple(int(c) for c in anchor + (np.add(a, b) // 2)))
+                       for name, (a, b) in zip(SN.order(), rectangles)])
+    layout = Layout(None, 0, digits)
+
+    rng = np.random.default_rng(seed)
+    readings = rng.integers(0, 10 ** digitCount, int(seconds / holdSec) + 2)
+    truth = np.empty(seconds * fps, dtype=np.int64)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    for i in range(seconds * fps):
+        truth[i] = readings[int(i / fps / holdSec)]
+
+        frame = np.full((size[1], size[0], 3), offColor, np.uint8)
+        for position, digit in enumerate(f'{truth[i]:0{digitCount}d}'):
+            anchor = origin + (round(digitWidth * position * 1.2), 0)
+            for name, (a, b) in zip(SN.order(), rectangles):
+                if Interrupt.dataSet[int(digit)][name]:
+                    cv2.rectangle(frame, tuple(anchor + a), tuple(anchor + b - 1), (onColor,) * 3, -1)
+
+        if drift or noise:
+            light = 1 - drift * i / (seconds * fps)
+            frame = frame * light
+            if noise:
+                frame = frame + rng.normal(0, noise, frame.shape)
+            frame = np.clip(frame, 0, 255).astype(np.uint8)
+        writer.write(frame)
+
+    writer.release()
+    return layout, truth
+
+
+def benchFrameSource(source, stepSec=1):
+    samples = 0
+    start = time.perf_counter()
+
+    sec = 0
+    while source.frameIndex(sec) < source.totalFrameCount:
+        ret, _ = source.read(source.frameIndex(sec))
+        if not ret:
+            break
+        samples += 1
+        sec += stepSec
+
+    elapsed = time.perf_counter() - start
+    source.release()
+    return samples, elapsed
+
+
+def benchScanner(videoPath, layout, truth, fps, decimalPoint=0, scan=None):
+    config = configparser.ConfigParser()
+    config.read_dict({
+        'Video': {'videoPath': videoPath, 'startSec': '0', 'decimalPoint': str(decimalPoint)},
+        'Scan': {'sampleInterval': '1', 'outputInterval': '1', 'aggregation': 'last',
+                 'patchSize': '2', 'calibrationFrames': '25', **(scan or {})}
+    })
+
+    profiler = Profiler(reportInterval=0)
+    start = time.perf_counter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Открытие видео, поиск ключевых кадров и выбор источника - подготовка, не декодирование
+        scanner = HeadlessScanner(config, layout, profiler=profiler)
+        setup = time.perf_counter() - start
+
+        scanStart = time.perf_counter()
+        data = scanner.scan()
+        scanTime = time.perf_counter() - scanStart
+    elapsed = time.perf_counter() - start
+
+    # Память измеряется вторым прогоном: tracemalloc замедляет выделение памяти и исказил бы скорость
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        HeadlessScanner(config, layout).scan()
+    memoryPeak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    summary = profiler.summary()
+    readings = [(sec, value) for sec, value in data.items() if round(fps * sec) < len(truth)]
+    correct = sum(abs(value - truth[round(fps * sec)] / 10 ** decimalPoint) < 1e-9 for sec, value in readings)
+
+    return {
+        'decodedFps': summary['counters'].get('framesDecoded', 0) / scanTime,
+        'decodeTime': sum(summary['stages'].get(stage, 0) for stage in ('seek', 'grab', 'retrieve', 'pipe')),
+        'latency': summary['latency'],
+        'latencyMax': summary['latencyMax'],
+        'setup': setup,
+        'total': elapsed,
+        'memoryPeak': memoryPeak,
+        'accuracy': correct / max(len(readings), 1)
+    }
+
+
+SUITE_BASE = {'size': (1280, 720), 'digitCount': 4, 'fps': 30, 'fourcc': 'mp4v', 'noise': 0, 'drift': 0}
+SUITE_VARIATIONS = [
+    {},
+    {'size': (640, 360)},
+    {'size': (1920, 1080)},
+    {'digitCount': 8},
+    {'fps': 60},
+    {'fourcc': 'MJPG'},
+    {'noise': 20},
+    {'drift': 0.4},
+    {'noise': 20, 'drift': 0.4}
+]
+
+
+def runSuite(seconds, output=None):
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for variation in SUITE_VARIATIONS:
+            scenario = {**SUITE_BASE, **variation}
+            path = os.path.join(directory, 'synthetic.avi' if scenario['fourcc'] == 'MJPG' else 'synthetic.mp4')
+
+            layout, truth = renderSevenSegmentClip(path, seconds, **scenario)
+            result = benchScanner(path, layout, truth, scenario['fps'])
+            results.append({'scenario': scenario, **result})
+
+            print(f"{scenario['size'][0]}x{scenario['size'][1]} digits={scenario['digitCount']} "
+                  f"fps={scenario['fps']} {scenario['fourcc']} noise={scenario['noise']} drift={scenario['drift']}: "
+                  f"{result['decodedFps']:.0f} decoded fps, setup {result['setup']:.2f} s, "
+                  f"latency {1000 * result['latency']:.2f} ms (max {1000 * result['latencyMax']:.2f}), "
+                  f"peak {result['memoryPeak'] / 2 ** 20:.1f} MiB, accuracy {100 * result['accuracy']:.1f}%")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+def runSeekComparison(args):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'synthetic.mp4')
+        renderSyntheticClip(path, args.seconds, args.fps, fourcc=args.fourcc)
+
+        streaming = StreamingFrameSource(path, args.keyframeInterval)
+        # По умолчанию шаг вдвое меньше интервала ключевых кадров: с большим шагом
+        # StreamingFrameSource тоже перематывает, и сравнивать было бы нечего
+        step = args.step if args.step is not None else max(streaming.keyframeInterval // 2, 1) / args.fps
+        stride = round(step * args.fps)
+        method = 'grab' if stride - 1 <= streaming.keyframeInterval else 'seek'
+        print(f'keyframe interval: {streaming.keyframeInterval}, step: {stride} frames (streaming uses {method})')
+
+        for name, source in (('seeking', SeekingFrameSource(path)), ('streaming', streaming)):
+            samples, elapsed = benchFrameSource(source, step)
+            print(f'{name:>10}: {samples} samples in {elapsed:.2f} s ({samples / elapsed:.1f} samples/s)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scanner benchmarks on synthetic clips')
+    commands = parser.add_subparsers(dest='command')
+
+    suite = commands.add_parser('suite', help='throughput and accuracy on synthetic seven-segment clips')
+    suite.add_argument('--seconds', type=int, default=30)
+    suite.add_argument('--output', help='write results as JSON')
+
+    seek = commands.add_parser('seek', help='seeking vs sequential decoding on a synthetic clip')
+    seek.add_argument('--seconds', type=int, default=60)
+    seek.add_argument('--fps', type=int, default=30)
+    seek.add_argument('--fourcc', default='mp4v')
+    seek.add_argument('--step', type=float, default=None,
+                      help='seconds between samples (default: half the keyframe interval)')
+    seek.add_argument('--keyframeInterval', type=int, default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == 'seek':
+        runSeekComparison(args)
+    else:
+        runSuite(getattr(args, 'seconds', 30), getattr(args, 'output', None))
+
+
+if __name__ == '__main__':
+    main()
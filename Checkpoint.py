@@ -0,0 +1,44 @@
+import json
+import os
+import time
+
+from Layout import Layout
+
+
+class Checkpoint:
+    # Файл рядом с видео с позицией сканирования, разметкой и состоянием файла экспорта.
+    # Значения до позиции уже лежат в файле экспорта: при продолжении он обрезается до сохранённого
+    # размера и дописывается. Форматы без потоковой записи до экспорта пишутся в журнал logName (CSV)
+
+    def __init__(self, videoPath, interval=60):
+        self.path = videoPath + '.ckpt'
+        self.logName = videoPath + '.partial'
+        self.interval = interval  # Секунды реального времени между сохранениями
+        self._lastSave = time.monotonic()
+
+    def due(self):
+        return self.interval > 0 and time.monotonic() - self._lastSave >= self.interval
+
+    def save(self, position, video):
+        state = {
+            'position': position,
+            'layout': Layout.fromScanner(video).toDict(),
+            'sink': None if video.sink is None else video.sink.state()
+        }
+
+        # Запись во временный файл и замена, чтобы прерывание не испортило прошлую точку
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(state, file)
+        os.replace(self.path + '.tmp', self.path)
+        self._lastSave = time.monotonic()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
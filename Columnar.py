@@ -0,0 +1,137 @@
+import json
+import os
+
+import numpy as np
+
+# Результаты хранятся в папке <имя>.columns: meta.json и по одному файлу на столбец.
+# Время и значение - по одному числу на строку, остальные столбцы - по одному числу на цифру.
+COLUMNS = {
+    'time': '<f8',
+    'value': '<f8',
+    'confidence': '<f4',  # достоверность показания от 0 до 1 (NaN - не оценивалась)
+    'codes': 'u1',  # 7-битные коды включённых сегментов
+    'digits': 'u1',  # распознанные цифры
+    'errors': 'u1'  # число несовпавших сегментов (0 - точное распознавание)
+}
+PER_DIGIT = ('codes', 'digits', 'errors')
+
+
+class ColumnarWriter:
+    extension = '.columns'
+
+    def __init__(self, fileName, flushEvery=100, digitCount=0, resume=None):
+        # digitCount - число цифр разметки; строки без массивов распознавания (details) получают в столбцах
+        # по цифрам нули, а достоверность NaN, поэтому все файлы столбцов соответствуют meta.json.
+        # resume - состояние state() из контрольной точки: столбцы обрезаются до сохранённого числа строк
+        self.path = fileName + self.extension
+        self.flushEvery = flushEvery
+        self.count = 0
+        self.digitCount = digitCount
+        if resume is None:
+            os.makedirs(self.path, exist_ok=True)
+            self.files = {name: open(os.path.join(self.path, name + '.bin'), 'wb') for name in COLUMNS}
+        else:
+            from Exporters import checkResume, truncateForResume
+
+            checkResume(self.path, resume)
+            self.count = resume['rows']
+            self.files = {}
+            for name, dtype in COLUMNS.items():
+                path = os.path.join(self.path, name + '.bin')
+                rowSize = np.dtype(dtype).itemsize * (self.digitCount if name in PER_DIGIT else 1)
+                self.files[name] = open(truncateForResume(path, self.count * rowSize), 'ab')
+        self._writeMeta()
+
+    def write(self, sec, value, details=None):
+        if details is not None and len(details['digits']) != self.digitCount:
+            raise ValueError(f"{self.path}: {len(details['digits'])} digits in a row, {self.digitCount} expected")
+
+        self.files['time'].write(np.float64(sec).tobytes())
+        self.files['value'].write(np.float64(value).tobytes())
+        confidence = details.get('confidence') if details is not None else None
+        self.files['confidence'].write(np.float32(np.nan if confidence is None else confidence).tobytes())
+        for name in PER_DIGIT:
+            column = details[name] if details is not None else np.zeros(self.digitCount)
+            self.files[name].write(np.asarray(column, dtype=COLUMNS[name]).tobytes())
+
+        self.count += 1
+        if self.flushEvery and not self.count % self.flushEvery:
+            self.flush()
+
+    def _writeMeta(self):
+        meta = {
+            'rows': self.count,
+            'digits': self.digitCount,
+            'columns': {name: {'dtype': dtype, 'perDigit': name in PER_DIGIT} for name, dtype in COLUMNS.items()}
+        }
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as file:
+            json.dump(meta, file, indent=2)
+
+    def state(self):
+        self.flush()
+        return {'path': self.path, 'rows': self.count}
+
+    def flush(self):
+        for file in self.files.values():
+            file.flush()
+        self._writeMeta()
+
+    def close(self):
+        self.flush()
+        for file in self.files.values():
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ColumnarReader:
+    # Столбцы открываются через np.memmap; число строк определяется по размеру файлов,
+    # поэтому читается и незавершённая запись
+
+    def __init__(self, path):
+        if not path.endswith(ColumnarWriter.extension):
+            path += ColumnarWriter.extension
+        self.path = path
+
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as file:
+            self.meta = json.load(file)
+        self.digitCount = self.meta['digits']
+
+        shapes = {}
+        rows = None
+        for name, column in self.meta['columns'].items():
+            shape = (self.digitCount,) if column['perDigit'] else ()
+            rowSize = np.dtype(column['dtype']).itemsize * int(np.prod(shape))
+            shapes[name] = shape
+            if rowSize:
+                fileRows = os.path.getsize(os.path.join(path, name + '.bin')) // rowSize
+                rows = fileRows if rows is None else min(rows, fileRows)
+        self.rows = rows or 0
+
+        self.columns = {}
+        for name, column in self.meta['columns'].items():
+            shape = (self.rows,) + shapes[name]
+            if self.rows and all(shape):
+                self.columns[name] = np.memmap(os.path.join(path, name + '.bin'), column['dtype'], 'r', shape=shape)
+            else:
+                self.columns[name] = np.empty(shape, column['dtype'])
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def slice(self, startSec=None, endSec=None):
+        # Строки с startSec <= время < endSec (время возрастает, поиск двоичный)
+        time = self.columns['time']
+        start = 0 if startSec is None else int(np.searchsorted(time, startSec, 'left'))
+        end = self.rows if endSec is None else int(np.searchsorted(time, endSec, 'left'))
+        return {name: column[start:end] for name, column in self.columns.items()}
+
+    def items(self):
+        return zip(self.columns['time'].tolist(), self.columns['value'].tolist())
@@ -0,0 +1,267 @@
+import ast
+import json
+import os
+import struct
+
+
+class Sink:
+    # Экспорт, в который значения записываются по мере сканирования
+
+    extension = ''
+
+    def __init__(self, fileName, flushEvery=100, resume=None):
+        # resume - состояние state(), сохранённое в контрольной точке: файл дописывается с этого места
+        self.path = fileName + self.extension
+        self.flushEvery = flushEvery
+        self.count = 0
+        if resume is None:
+            self.open()
+        else:
+            self.reopen(resume)
+
+    def open(self):
+        self.file = open(self.path, 'w', encoding='utf-8')
+
+    def state(self):
+        # Число строк и размер файла после сброса на диск
+        self.flush()
+        return {'path': self.path, 'rows': self.count, 'offset': self.file.tell()}
+
+    def reopen(self, state):
+        # Строки, записанные после сохранения состояния, отбрасываются
+        checkResume(self.path, state)
+        self.count = state['rows']
+        self.file = open(truncateForResume(self.path, state['offset']), 'a', encoding='utf-8')
+
+    def write(self, sec, value, details=None):
+        # details - необязательный словарь с массивами распознавания по цифрам (codes, digits, errors)
+        # и достоверностью показания (confidence)
+        self.writeRow(sec, value, None if details is None else details.get('confidence'))
+        self.count += 1
+        if self.flushEvery and not self.count % self.flushEvery:
+            self.flush()
+
+    def writeRow(self, sec, value, confidence=None):
+        raise NotImplementedError
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RawTXTSink(Sink):
+    extension = '.txt'
+
+    def writeRow(self, sec, value, confidence=None):
+        self.file.write(f'{value}\n')
+
+
+class CSVSink(Sink):
+    extension = '.csv'
+
+    def open(self):
+        super().open()
+        self.file.write('sec,value,confidence\n')
+
+    def writeRow(self, sec, value, confidence=None):
+        self.file.write(f"{sec},{value},{'' if confidence is None else round(confidence, 3)}\n")
+
+
+class JSONSink(Sink):
+    # Одна строка JSON на значение
+    extension = '.jsonl'
+
+    def writeRow(self, sec, value, confidence=None):
+        row = {'sec': sec, 'value': value}
+        if confidence is not None:
+            row['confidence'] = round(confidence, 3)
+        self.file.write(json.dumps(row) + '\n')
+
+
+class NumpySink(Sink):
+    # Файл .npy с одномерным массивом float64; заголовок имеет постоянную длину
+    # и переписывается при каждом сбросе, поэтому файл читается np.load в любой момент
+    extension = '.npy'
+    headerSize = 128
+
+    def open(self):
+        self.file = open(self.path, 'wb')
+        self._writeHeader()
+
+    def _writeHeader(self):
+        header = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d,), }" % self.count
+        header = header.ljust(self.headerSize - 10 - 1) + '\n'
+        self.file.seek(0)
+        self.file.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1'))
+        self.file.seek(0, 2)
+
+    def reopen(self, state):
+        checkResume(self.path, state)
+        self.count = state['rows']
+        self.file = open(truncateForResume(self.path, state['offset']), 'r+b')
+        self.file.seek(0, 2)
+
+    def writeRow(self, sec, value, confidence=None):
+        self.file.write(struct.pack('<d', value))
+
+    def flush(self):
+        self._writeHeader()
+        self.file.flush()
+
+
+class ExcelSink(Sink):
+    # В режиме constant_memory xlsxwriter сбрасывает каждую строку на диск после перехода к следующей,
+    # но файл .xlsx собирается только при закрытии книги. Поэтому до закрытия строки дублируются
+    # в <имя>.partial.csv, который сбрасывается на диск вместе с остальными форматами и удаляется
+    # после записи книги: если процесс убит, значения остаются в нём
+    extension = '.xlsx'
+
+    def open(self):
+        self._newWorkbook()
+        self.partial = CSVSink(self.path[:-len(self.extension)] + '.partial', flushEvery=0)
+
+    def _newWorkbook(self):
+        import xlsxwriter
+
+        self.workbook = xlsxwriter.Workbook(self.path, {'constant_memory': True})
+        self.worksheet = self.workbook.add_worksheet()
+        self.worksheet.write(0, 1, 'Секунда')
+        self.worksheet.write(0, 2, 'Значение')
+        self.worksheet.write(0, 3, 'Достоверность')
+
+    def state(self):
+        return {**self.partial.state(), 'path': self.path, 'rows': self.count}
+
+    def reopen(self, state):
+        # Книга собирается заново из строк <имя>.partial.csv до сохранённого состояния
+        checkResume(self.path, state)
+        self._newWorkbook()
+        name = self.path[:-len(self.extension)] + '.partial'
+        self.partial = CSVSink(name, flushEvery=0, resume={**state, 'path': name + CSVSink.extension})
+        with open(self.partial.path, 'r', encoding='utf-8') as file:
+            next(file)
+            for self.count, line in enumerate(file):
+                sec, value, confidence = line.rstrip('\n').split(',')
+                self.writeExcelRow(_number(sec), _number(value), float(confidence) if confidence else None)
+        self.count = state['rows']
+
+    def writeRow(self, sec, value, confidence=None):
+        self.writeExcelRow(sec, value, confidence)
+        self.partial.writeRow(sec, value, confidence)
+
+    def writeExcelRow(self, sec, value, confidence=None):
+
+        self.worksheet.write(self.count + 1, 1, sec)
+        self.worksheet.write(self.count + 1, 2, value)
+        if confidence is not None:
+            self.worksheet.write(self.count + 1, 3, round(confidence, 3))
+
+    def flush(self):
+        self.partial.flush()
+
+    def close(self):
+        self.workbook.close()
+        self.partial.close()
+        os.remove(self.partial.path)
+
+
+def ColumnarSink(fileName, flushEvery=100, resume=None, digitCount=0):
+    # numpy загружается только для этого формата
+    from Columnar import ColumnarWriter
+
+    return ColumnarWriter(fileName, flushEvery, digitCount, resume)
+
+
+SINKS = {'RawTXT': RawTXTSink, 'CSV': CSVSink, 'JSON': JSONSink, 'NumpyArray': NumpySink, 'Excel': ExcelSink,
+         'Columnar': ColumnarSink}
+
+
+def createSink(config, digitCount=0, resume=None):
+    # digitCount - число цифр разметки для столбцов по цифрам формата Columnar,
+    # resume - состояние файла экспорта из контрольной точки
+    sink = SINKS.get(config['Export']['exportFormat'])
+    if sink is None:
+        return None
+    if sink is ColumnarSink:
+        return sink(config['Export']['exportFileName'], config.getint('Export', 'flushEvery', fallback=100),
+                    resume, digitCount)
+    return sink(config['Export']['exportFileName'], config.getint('Export', 'flushEvery', fallback=100), resume)
+
+
+def checkResume(path, state):
+    # Контрольная точка должна продолжать тот же файл экспорта
+    if state['path'] != path:
+        raise ValueError(f"the checkpoint continues {state['path']}, not {path} (was the export format changed?)")
+
+
+def truncateForResume(path, size):
+    # Обрезает файл экспорта до размера на момент контрольной точки
+    if not os.path.exists(path) or os.path.getsize(path) < size:
+        raise ValueError(f'{path} is missing or shorter than at the checkpoint')
+    with open(path, 'r+b') as file:
+        file.truncate(size)
+    return path
+
+
+def readResults(path, startSec=0, step=1):
+    # Значения {секунда: значение} из файла любого формата экспорта, кроме Excel и Graph.
+    # В форматах без времени (RawTXT, PythonList, NumpyArray) секунды отсчитываются от startSec с шагом step
+    if path.endswith('.columns') or os.path.isdir(path):
+        from Columnar import ColumnarReader
+
+        return dict(ColumnarReader(path).items())
+
+    if path.endswith('.npy'):
+        with open(path, 'rb') as file:
+            file.seek(8)
+            headerSize = struct.unpack('<H', file.read(2))[0]
+            file.seek(10 + headerSize)
+            data = file.read()
+        values = struct.unpack(f'<{len(data) // 8}d', data[:len(data) // 8 * 8])
+        return {_key(startSec + i * step): v for i, v in enumerate(values)}
+
+    with open(path, 'r', encoding='utf-8') as file:
+        text = file.read()
+
+    if path.endswith('.spans.json'):
+        from Spans import Spans
+
+        raw = json.loads(text)
+        spans = Spans(raw['step'])
+        for start, end, value in raw['spans']:
+            spans.addSpan(start, end, value)
+        return spans
+    if path.endswith('.jsonl'):
+        rows = [json.loads(line) for line in text.splitlines() if line]
+        return {row['sec']: row['value'] for row in rows}
+    if path.endswith('.csv'):
+        rows = [line.split(',') for line in text.splitlines()[1:] if line]
+        return {_number(row[0]): _number(row[1]) for row in rows}
+
+    # .txt: PythonDict, PythonList или RawTXT
+    text = text.strip()
+    if text.startswith('{'):
+        return ast.literal_eval(text)
+    values = ast.literal_eval(text) if text.startswith('[') else [_number(line) for line in text.splitlines()]
+    return {_key(startSec + i * step): v for i, v in enumerate(values)}
+
+
+def _number(text):
+    if text == 'None':
+        # Секунда, кадр которой не прочитан
+        return None
+    value = float(text)
+    return int(value) if value.is_integer() and '.' not in text else value
+
+
+def _key(sec):
+    return int(sec) if float(sec).is_integer() else round(sec, 6)
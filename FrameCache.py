@@ -0,0 +1,156 @@
+import collections
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from FrameSource import SeekingFrameSource, StreamingFrameSource
+
+
+class RenderCache:
+    # Последние maxSize подготовленных для показа кадров (без разметки); вытесняется самый давний по обращению
+
+    def __init__(self, maxSize=16):
+        self.maxSize = maxSize
+        self._items = collections.OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, item):
+        if self.maxSize <= 0:
+            return
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxSize:
+            self._items.popitem(last=False)
+
+
+class ThumbnailIndex:
+    # Уменьшенные кадры области region (x0, y0, x1, y1; None - весь кадр) через каждые interval секунд,
+    # длинная сторона не больше size пикселей; для показа они растягиваются до размера окна.
+    # Хранятся в файле .npy папки directory (по умолчанию <видео>.thumbs), который отображается в память
+    # и заполняется по мере обращения или заранее потоком build(). В папке остаются миниатюры только
+    # последней области; при изменении видеофайла папка очищается.
+
+    def __init__(self, videoPath, region, size=320, interval=1, directory=None):
+        self.videoPath = videoPath
+        self.region = region
+        self.interval = interval
+        self.directory = directory or videoPath + '.thumbs'
+        self._source = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        capture = cv2.VideoCapture(videoPath)
+        self.fps = capture.get(cv2.CAP_PROP_FPS)
+        self.totalFrameCount = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        capture.release()
+        count = int((self.totalFrameCount - 1) / self.fps / interval) + 1 if self.fps else 1
+
+        x0, y0, x1, y1 = region if region is not None else (0, 0, width, height)
+        width, height = min(x1, width) - x0, min(y1, height) - y0
+        scale = min(size / max(width, height, 1), 1)
+        self.size = max(round(width * scale), 1), max(round(height * scale), 1)
+
+        self._checkSource()
+        name = f'{x0}_{y0}_{x1}_{y1}_{self.size[0]}x{self.size[1]}_{interval:g}'
+        self._removeOthers(name)
+        name = os.path.join(self.directory, name)
+        shape = (count, self.size[1], self.size[0], 3)
+        self.thumbnails = None
+        if os.path.exists(name + '.npy') and os.path.exists(name + '.filled.npy'):
+            self.thumbnails = np.load(name + '.npy', mmap_mode='r+')
+            self.filled = np.load(name + '.filled.npy', mmap_mode='r+')
+        if self.thumbnails is None or self.thumbnails.shape != shape or self.filled.shape != shape[:1]:
+            self.thumbnails = np.lib.format.open_memmap(name + '.npy', 'w+', np.uint8, shape)
+            self.filled = np.lib.format.open_memmap(name + '.filled.npy', 'w+', np.bool_, (count,))
+
+    @staticmethod
+    def fromConfig(config, region):
+        return ThumbnailIndex(config['Video']['videoPath'], region,
+                              config.getint('Editor', 'thumbnailSize', fallback=320),
+                              config.getfloat('Editor', 'thumbnailInterval', fallback=1),
+                              config.get('Editor', 'thumbnailDir', fallback='') or None)
+
+    def _removeOthers(self, name):
+        # Миниатюры других областей (прежних обрезок) удаляются
+        for fileName in os.listdir(self.directory):
+            if fileName.endswith('.npy') and fileName not in (name + '.npy', name + '.filled.npy'):
+                try:
+                    os.remove(os.path.join(self.directory, fileName))
+                except OSError:
+                    # Файл ещё отображён в память другим индексом (Windows) - удалится в следующий раз
+                    pass
+
+    def _checkSource(self):
+        # Миниатюры другой версии видеофайла удаляются
+        os.makedirs(self.directory, exist_ok=True)
+        stat = os.stat(self.videoPath)
+        source = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        sourcePath = os.path.join(self.directory, 'source.json')
+        if os.path.exists(sourcePath):
+            with open(sourcePath, 'r', encoding='utf-8') as file:
+                if json.load(file) == source:
+                    return
+            for name in os.listdir(self.directory):
+                if name.endswith('.npy'):
+                    os.remove(os.path.join(self.directory, name))
+        with open(sourcePath, 'w', encoding='utf-8') as file:
+            json.dump(source, file)
+
+    def index(self, sec):
+        return min(max(int(round(sec / self.interval)), 0), len(self.filled) - 1)
+
+    def _thumbnail(self, frame):
+        if self.region is not None:
+            x0, y0, x1, y1 = self.region
+            frame = frame[y0:y1, x0:x1]
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+
+    def get(self, sec):
+        # Миниатюра ближайшего к sec кадра сетки; отсутствующая декодируется и сохраняется
+        i = self.index(sec)
+        if not self.filled[i]:
+            if self._source is None:
+                self._source = SeekingFrameSource(self.videoPath)
+            ret, frame = self._source.read(self._source.frameIndex(i * self.interval))
+            if not ret:
+                return None
+            self.thumbnails[i] = self._thumbnail(frame)
+            self.filled[i] = True
+        return self.thumbnails[i]
+
+    def build(self):
+        # Заполнение всех миниатюр в фоновом потоке последовательным чтением видео
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._build, daemon=True)
+            self._thread.start()
+
+    def _build(self):
+        source = StreamingFrameSource(self.videoPath)
+        for i in np.flatnonzero(~self.filled):
+            if self._stop.is_set():
+                break
+            ret, frame = source.read(source.frameIndex(i * self.interval))
+            if not ret:
+                break
+            self.thumbnails[i] = self._thumbnail(frame)
+            self.filled[i] = True
+        source.release()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._source is not None:
+            self._source.release()
+        self.thumbnails.flush()
+        self.filled.flush()
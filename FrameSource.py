@@ -0,0 +1,484 @@
+import collections
+import json
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from Profiler import NullProfiler
+
+
+def probeKeyframeInterval(path, frames=300):
+    # Читает пакеты без декодирования и ищет расстояние между ключевыми кадрами
+    capture = cv2.VideoCapture(path, cv2.CAP_FFMPEG)
+    if not capture.isOpened() or not capture.set(cv2.CAP_PROP_FORMAT, -1):
+        capture.release()
+        return None
+
+    keyframes = []
+    for i in range(frames):
+        if not capture.grab():
+            break
+        if capture.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+            keyframes.append(i)
+    capture.release()
+
+    if len(keyframes) < 2:
+        return None
+    return max(b - a for a, b in zip(keyframes, keyframes[1:]))
+
+
+class FrameSource:
+    # apiPreference - бэкенд OpenCV (cv2.CAP_*), threads - число потоков декодирования (0 - по умолчанию)
+    scale = 1  # Масштаб возвращаемых кадров относительно исходного видео
+
+    def __init__(self, path, apiPreference=cv2.CAP_ANY, threads=0):
+        self.path = path
+        if threads:
+            self._capture = cv2.VideoCapture(path, apiPreference, [cv2.CAP_PROP_N_THREADS, threads])
+        else:
+            self._capture = cv2.VideoCapture(path, apiPreference)
+        self.name = f'opencv/{self._capture.getBackendName()}' if self._capture.isOpened() else 'opencv'
+        self.fps = self._capture.get(cv2.CAP_PROP_FPS)
+        self.totalFrameCount = self._capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        self.position = 0  # Номер кадра, который будет декодирован следующим
+
+        # Область (x0, y0, x1, y1), которую нужно вернуть вместо полного кадра
+        self.roi = None
+        self._frameBuffer = None
+        self._roiBuffer = None
+        self.profiler = NullProfiler()
+
+    def frameIndex(self, sec):
+        return int(round(self.fps * sec))
+
+    def read(self, frameIndex, out=None):
+        # out - буфер, в который по возможности записывается кадр
+        raise NotImplementedError
+
+    def prefetch(self, frameIndices):
+        # Номера кадров, которые будут прочитаны следующими (используется PrefetchFrameSource)
+        pass
+
+    def _seek(self, frameIndex):
+        started = self.profiler.now()
+        self._capture.set(cv2.CAP_PROP_POS_FRAMES, frameIndex)
+        self.profiler.stage('seek', started)
+
+    def _grab(self):
+        started = self.profiler.now()
+        ret = self._capture.grab()
+        self.profiler.stage('grab', started)
+        self.profiler.count('framesDecoded')
+        return ret
+
+    def _retrieve(self, out=None):
+        started = self.profiler.now()
+        if self.roi is None and out is not None:
+            ret, frame = self._capture.retrieve(out)
+        else:
+            ret, self._frameBuffer = self._capture.retrieve(self._frameBuffer)
+            frame = self._crop(self._frameBuffer, out) if ret else None
+        self.profiler.stage('retrieve', started)
+        if not ret:
+            return False, None
+        return True, frame
+
+    def _crop(self, frame, out=None):
+        if self.roi is None:
+            return frame
+
+        x0, y0, x1, y1 = self.roi
+        view = frame[y0:y1, x0:x1]
+        if out is None:
+            if self._roiBuffer is None or self._roiBuffer.shape != view.shape:
+                self._roiBuffer = np.empty_like(view)
+            out = self._roiBuffer
+        elif out.shape != view.shape:
+            out = np.empty_like(view)
+        np.copyto(out, view)
+        return out
+
+    def release(self):
+        self._capture.release()
+
+
+class SeekingFrameSource(FrameSource):
+    # Перемотка перед каждым кадром (прежнее поведение VideoScanner._scan)
+
+    def read(self, frameIndex, out=None):
+        self._seek(frameIndex)
+        self.position = frameIndex + 1
+        if not self._grab():
+            return False, None
+        return self._retrieve(out)
+
+
+class StreamingFrameSource(FrameSource):
+    # Последовательное чтение: ненужные кадры пропускаются через grab(),
+    # декодируется в изображение (retrieve()) только запрошенный кадр.
+    # Если шаг больше интервала ключевых кадров, перемотка дешевле.
+
+    def __init__(self, path, keyframeInterval=None, apiPreference=cv2.CAP_ANY, threads=0):
+        super().__init__(path, apiPreference, threads)
+        if keyframeInterval is None:
+            keyframeInterval = probeKeyframeInterval(path) or 250
+        self.keyframeInterval = keyframeInterval
+
+    @staticmethod
+    def fromConfig(config):
+        keyframeInterval = config['Video'].get('keyframeInterval', 'auto')
+        keyframeInterval = None if keyframeInterval == 'auto' else int(keyframeInterval)
+        apiPreference = getattr(cv2, 'CAP_' + config.get('Video', 'opencvBackend', fallback='ANY').upper())
+        threads = config.getint('Video', 'decodeThreads', fallback=0)
+
+        prefetch = config.getint('Video', 'prefetch', fallback=0)
+        if prefetch > 0:
+            return PrefetchFrameSource(config['Video']['videoPath'], keyframeInterval, prefetch, apiPreference, threads)
+        return StreamingFrameSource(config['Video']['videoPath'], keyframeInterval, apiPreference, threads)
+
+    def read(self, frameIndex, out=None):
+        gap = frameIndex - self.position
+        if gap < 0 or gap > self.keyframeInterval:
+            self._seek(frameIndex)
+        else:
+            for _ in range(gap):
+                if not self._grab():
+                    self.position = frameIndex + 1
+                    return False, None
+
+        self.position = frameIndex + 1
+        if not self._grab():
+            return False, None
+        return self._retrieve(out)
+
+
+class PrefetchFrameSource(StreamingFrameSource):
+    # Кадры из prefetch() декодируются отдельным потоком на depth - 1 кадров вперёд в кольцо
+    # из depth буферов, выделяемых один раз. OpenCV отпускает GIL во время декодирования,
+    # поэтому распознавание текущего кадра идёт параллельно с декодированием следующих.
+    # Кадр, возвращённый read(), остаётся действительным до следующего вызова read().
+
+    def __init__(self, path, keyframeInterval=None, depth=4, apiPreference=cv2.CAP_ANY, threads=0):
+        super().__init__(path, keyframeInterval, apiPreference, threads)
+        self.depth = max(depth, 2)
+        self._buffers = [None] * self.depth
+        self._free = None
+        self._ready = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._held = None  # (номер кадра, ret, номер буфера), отданный последним read()
+
+    def prefetch(self, frameIndices):
+        self._stopPrefetch()
+        self._free = queue.Queue()
+        for slot in range(self.depth):
+            self._free.put(slot)
+        self._ready = queue.Queue()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._decode, args=(iter(frameIndices),), daemon=True)
+        self._thread.start()
+
+    def _decode(self, frameIndices):
+        for frameIndex in frameIndices:
+            slot = None
+            while slot is None:
+                if self._stop.is_set():
+                    return
+                try:
+                    slot = self._free.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+            ret, frame = super().read(frameIndex, self._buffers[slot])
+            if ret:
+                # Без буфера кадр читается в общий буфер источника - при первом заполнении он копируется
+                self._buffers[slot] = frame if self._buffers[slot] is not None else frame.copy()
+            self._ready.put((frameIndex, ret, slot))
+            if not ret:
+                break
+        self._ready.put(None)
+
+    def _stopPrefetch(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        self._thread = None
+        self._held = None
+
+    def read(self, frameIndex, out=None):
+        if self._held is not None:
+            # Повторное чтение того же кадра не декодирует его заново
+            if self._held[0] == frameIndex:
+                return self._held[1], self._buffers[self._held[2]]
+            self._free.put(self._held[2])
+            self._held = None
+
+        if self._thread is None:
+            return super().read(frameIndex, out)
+
+        started = self.profiler.now()
+        item = self._ready.get()
+        self.profiler.stage('prefetchWait', started)
+
+        if item is None or item[0] != frameIndex:
+            # Запрошен кадр не по порядку prefetch() - дальше кадры читаются без потока
+            self._stopPrefetch()
+            return super().read(frameIndex, out)
+
+        self._held = item
+        return item[1], self._buffers[item[2]] if item[1] else None
+
+    def release(self):
+        self._stopPrefetch()
+        super().release()
+
+
+class FFmpegFrameSource:
+    # Декодирование внешним процессом ffmpeg: в канал выдаётся только область roi, в оттенках серого
+    # (gray) и/или уменьшенная (scale < 1), кадры читаются в один и тот же буфер.
+    # Кадры идут подряд; ненужные пропускаются чтением в тот же буфер, а назад и дальше
+    # keyframeInterval кадров процесс перезапускается с -ss.
+
+    def __init__(self, path, gray=True, scale=1, keyframeInterval=250):
+        self.path = path
+        self.gray = gray
+        self.scale = scale
+        self.keyframeInterval = keyframeInterval
+        self.name = 'ffmpeg' + ('/gray' if gray else '') + (f'/x{scale:g}' if scale != 1 else '')
+
+        probe = self._probe('stream=width,height,r_frame_rate,nb_frames,duration:format=duration')
+        stream = probe['streams'][0]
+        numerator, denominator = stream['r_frame_rate'].split('/')
+        self.fps = int(numerator) / int(denominator)
+        self.size = int(stream['width']), int(stream['height'])
+
+        # Число кадров из заголовка контейнера, иначе по длительности; пакеты пересчитываются
+        # (чтением всего файла) только если нет ни того, ни другого
+        duration = stream.get('duration', 'N/A')
+        if duration == 'N/A':
+            duration = probe.get('format', {}).get('duration', 'N/A')
+        if stream.get('nb_frames', 'N/A') != 'N/A':
+            self.totalFrameCount = int(stream['nb_frames'])
+        elif duration != 'N/A':
+            self.totalFrameCount = int(round(float(duration) * self.fps))
+        else:
+            self.totalFrameCount = int(self._probe('stream=nb_read_packets', '-count_packets')
+                                       ['streams'][0]['nb_read_packets'])
+
+        self.position = 0
+        self.roi = None
+        self.profiler = NullProfiler()
+        self._process = None
+        self._buffer = None
+
+    def _probe(self, entries, *options):
+        probe = subprocess.run(['ffprobe', '-v', 'error', '-select_streams', 'v:0', *options,
+                                '-show_entries', entries, '-of', 'json', self.path], capture_output=True, check=True)
+        return json.loads(probe.stdout)
+
+    @staticmethod
+    def available():
+        return shutil.which('ffmpeg') is not None and shutil.which('ffprobe') is not None
+
+    @staticmethod
+    def fromConfig(config):
+        keyframeInterval = config['Video'].get('keyframeInterval', 'auto')
+        return FFmpegFrameSource(config['Video']['videoPath'],
+                                 config.getboolean('Video', 'grayscale', fallback=True),
+                                 config.getfloat('Video', 'decodeScale', fallback=1),
+                                 250 if keyframeInterval == 'auto' else int(keyframeInterval))
+
+    def frameIndex(self, sec):
+        return int(round(self.fps * sec))
+
+    def prefetch(self, frameIndices):
+        pass
+
+    def _start(self, frameIndex):
+        self._stop()
+        started = self.profiler.now()
+
+        # Отступ области может выходить за край кадра - ffmpeg обрезает только внутри кадра
+        x0, y0, x1, y1 = self.roi if self.roi is not None else (0, 0) + self.size
+        x1, y1 = min(x1, self.size[0]), min(y1, self.size[1])
+        width, height = x1 - x0, y1 - y0
+        outWidth, outHeight = max(int(width * self.scale), 1), max(int(height * self.scale), 1)
+        filters = [f'crop={width}:{height}:{x0}:{y0}:exact=1']
+        if self.scale != 1:
+            filters.append(f'scale={outWidth}:{outHeight}:flags=area')
+
+        command = ['ffmpeg', '-v', 'error', '-nostdin']
+        if frameIndex:
+            command += ['-ss', f'{frameIndex / self.fps:.6f}']
+        command += ['-i', self.path, '-vf', ','.join(filters), '-vsync', '0',
+                    '-f', 'rawvideo', '-pix_fmt', 'gray' if self.gray else 'bgr24', '-']
+
+        shape = (outHeight, outWidth) if self.gray else (outHeight, outWidth, 3)
+        if self._buffer is None or self._buffer.shape != shape:
+            self._buffer = np.empty(shape, np.uint8)
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                         bufsize=4 * self._buffer.nbytes)
+        self.position = frameIndex
+        self.profiler.stage('seek', started)
+
+    def _next(self):
+        view = memoryview(self._buffer).cast('B')
+        received = 0
+        while received < len(view):
+            count = self._process.stdout.readinto(view[received:])
+            if not count:
+                # Конец видео или ошибка ffmpeg: ошибка не должна выглядеть как конец видео
+                if self._process.wait():
+                    message = self._process.stderr.read().decode(errors='replace').strip()
+                    raise RuntimeError(f'{self.path}: ffmpeg failed: {message}')
+                return False
+            received += count
+        self.position += 1
+        self.profiler.count('framesDecoded')
+        return True
+
+    def read(self, frameIndex, out=None):
+        gap = frameIndex - self.position
+        if self._process is None or gap < 0 or gap > self.keyframeInterval:
+            self._start(frameIndex)
+
+        started = self.profiler.now()
+        while self.position <= frameIndex:
+            if not self._next():
+                return False, None
+        self.profiler.stage('pipe', started)
+        return True, self._buffer
+
+    def _stop(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process.stderr.close()
+            self._process = None
+
+    def release(self):
+        self._stop()
+
+
+def openFrameSource(config, roi=None, probeFrames=60):
+    # Источник кадров для сканирования по разметке. [Video] backend: opencv, ffmpeg или auto -
+    # каждый доступный источник читает probeFrames кадров области roi, выбирается самый быстрый
+    backend = config.get('Video', 'backend', fallback='opencv')
+    candidates = {}
+    if backend in ('opencv', 'auto'):
+        candidates['opencv'] = StreamingFrameSource.fromConfig
+    if backend in ('ffmpeg', 'auto') and FFmpegFrameSource.available():
+        candidates['ffmpeg'] = FFmpegFrameSource.fromConfig
+    if not candidates:
+        print(f'Frame source: {backend} is not available, using opencv')
+        candidates['opencv'] = StreamingFrameSource.fromConfig
+
+    timings = {}
+    counts = {}
+    if len(candidates) > 1:
+        for name, create in candidates.items():
+            source = create(config)
+            source.roi = roi
+            first = source.frameIndex(int(config['Video']['startSec']))
+            counts[name] = 0
+            started = time.perf_counter()
+            try:
+                for frameIndex in range(first, first + probeFrames):
+                    if not source.read(frameIndex)[0]:
+                        break
+                    counts[name] += 1
+            except (RuntimeError, OSError) as error:
+                print(f'Frame source: {name} failed ({error})')
+            timings[name] = time.perf_counter() - started
+            source.release()
+
+        # Источник, прочитавший меньше кадров, чем другие, не выбирается, как бы быстро он ни закончил
+        # (короче probeFrames может оказаться только само видео)
+        complete = max(counts.values())
+        timings = {name: t for name, t in timings.items() if counts[name] == complete and complete}
+
+    name = min(timings, key=timings.get) if timings else next(iter(candidates))
+    source = candidates[name](config)
+    source.roi = roi
+    print(f'Frame source: {source.name}' +
+          (' (' + ', '.join(f'{n} {probeFrames / t:.0f} fps' for n, t in timings.items()) + ')' if timings else ''))
+    return source
+
+
+class LiveFrameSource(FrameSource):
+    # Камера (номер устройства) или поток (URL). Кадры читаются отдельным потоком в очередь
+    # из queueSize кадров; если обработка отстаёт, самые старые кадры выбрасываются.
+    # replay - проигрывать файл со скоростью записи (вместо настоящего потока)
+
+    def __init__(self, source, queueSize=2, replay=False):
+        super().__init__(int(source) if str(source).isdigit() else source)
+        self.replay = replay
+        self.dropped = 0
+        self._queue = collections.deque(maxlen=queueSize)
+        self._available = threading.Condition()
+        self._running = True
+        self._finished = False
+
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    @staticmethod
+    def fromConfig(config):
+        return LiveFrameSource(config['Video']['liveSource'],
+                               config.getint('Video', 'liveQueueSize', fallback=2),
+                               config.getboolean('Video', 'liveReplay', fallback=False))
+
+    def _read(self):
+        interval = 1 / self.fps if self.replay and self.fps > 0 else 0
+        nextFrame = time.monotonic()
+
+        # Захват закрывается этим же потоком после выхода из цикла: release() из другого потока
+        # во время блокирующего read() разрушил бы захват, пока OpenCV ещё читает из него
+        try:
+            while self._running:
+                ret, frame = self._capture.read()
+                timestamp = time.time()
+
+                with self._available:
+                    if not ret:
+                        return
+                    if len(self._queue) == self._queue.maxlen:
+                        self.dropped += 1
+                        self.profiler.count('framesDropped')
+                    self._queue.append((timestamp, frame))
+                    self.profiler.count('framesDecoded')
+                    self._available.notify()
+
+                if interval:
+                    nextFrame += interval
+                    time.sleep(max(0, nextFrame - time.monotonic()))
+        finally:
+            self._capture.release()
+            with self._available:
+                self._finished = True
+                self._available.notify_all()
+
+    def next(self, timeout=None):
+        # Самый старый из оставшихся в очереди кадров: (есть ли кадр, время получения, кадр)
+        with self._available:
+            if not self._available.wait_for(lambda: self._queue or self._finished, timeout):
+                return False, None, None
+            if not self._queue:
+                return False, None, None
+            timestamp, frame = self._queue.popleft()
+        return True, timestamp, self._crop(frame)
+
+    def read(self, frameIndex, out=None):
+        ret, _, frame = self.next()
+        return ret, frame
+
+    def release(self):
+        # Поток чтения завершается после текущего кадра и сам закрывает захват
+        self._running = False
+        self._reader.join()
@@ -0,0 +1,220 @@
+import math
+
+import numpy as np
+
+from Aggregation import AGGREGATIONS
+from FrameSource import openFrameSource
+from Preview import Preview
+from Profiler import Profiler
+from ReadingFilter import ReadingFilter
+from Spans import Spans
+from Threshold import AdaptiveThreshold
+from VideoScanner import CompiledLayout, Interrupt
+
+
+class HeadlessScanner:
+    # Сканирование по сохранённой разметке без окон HighGUI
+
+    def __init__(self, config, layout, startSec=None, endSec=None, profiler=None, source=None):
+        self.config = config
+        self.path = config['Video']['videoPath']
+        self.profiler = Profiler.fromConfig(config) if profiler is None else profiler
+        self.decimalPoint = int(self.config['Video']['decimalPoint'])
+
+        self.layout = layout
+        self.cropping = layout.cropping
+        self.rotate = layout.rotate
+        self.digits = layout.build(self)
+        self.indicators = layout.indicators
+        calibrationFrames = config.getint('Scan', 'calibrationFrames', fallback=0)
+        threshold = None
+        if calibrationFrames:
+            threshold = AdaptiveThreshold(len(self.digits) * 7 + len(self.indicators), calibrationFrames,
+                                          config.getfloat('Scan', 'adaptRate', fallback=0.02))
+
+        self.compiled = CompiledLayout(self.digits, config.getint('Scan', 'roiMargin', fallback=16),
+                                       config.getint('Scan', 'patchSize', fallback=0), threshold, self.indicators)
+
+        # Источник выбирается, когда известна область сегментов: ffmpeg декодирует только её
+        self._source = openFrameSource(config, self.compiled.roi) if source is None else source
+        self._source.roi = self.compiled.roi
+        self._source.profiler = self.profiler
+        if self._source.scale != 1:
+            self.compiled.rescale(self._source.scale)
+        self.fps = self._source.fps
+        self.totalFrameCount = self._source.totalFrameCount
+
+        # Окно предпросмотра, обновляемое не чаще previewRate раз в секунду (0 - без окна)
+        previewRate = config.getfloat('Scan', 'previewRate', fallback=0)
+        self.preview = Preview(self.compiled, previewRate) if previewRate > 0 else None
+
+        # Интервалы вывода отсчитываются от startSec из конфигурации, даже если сканируется только отрезок видео
+        self.originSec = int(self.config['Video']['startSec'])
+        self.currentSecScan = self.originSec if startSec is None else startSec
+        self.endSec = float('inf') if endSec is None else endSec
+
+        self.sampleInterval = config.getfloat('Scan', 'sampleInterval', fallback=1)
+        self.outputInterval = config.getfloat('Scan', 'outputInterval', fallback=1)
+        self.aggregate = AGGREGATIONS[config.get('Scan', 'aggregation', fallback='last')]
+        self.filter = ReadingFilter.fromConfig(config)
+
+        # Инкрементальный режим: если выборки сегментов не изменились, повторно используется
+        # прошлое значение, а результаты хранятся отрезками одинаковых показаний
+        self.incremental = config.getboolean('Scan', 'incremental', fallback=False)
+        self._lastCodes = None
+        self._lastIndicators = None
+        self._lastValue = None
+
+        self.global_scan_data = Spans(self.outputInterval) if self.incremental else {}
+        self.scan_data = []
+        self.lastReading = None
+        self._sampledAt = None  # Время получения последнего выбранного кадра (для задержки показания)
+        self.sink = None
+        self.checkpoint = None
+
+    def _frames(self):
+        # Номера сканируемых кадров в порядке возрастания
+        endFrame = self.totalFrameCount
+        if self.endSec != float('inf'):
+            endFrame = min(endFrame, self._source.frameIndex(self.endSec))
+
+        if self.sampleInterval <= 0:
+            yield from range(self._source.frameIndex(self.currentSecScan), int(endFrame))
+            return
+
+        j = math.ceil((self.currentSecScan - self.originSec) / self.sampleInterval - 1e-9)
+        while True:
+            frameIndex = self._source.frameIndex(self.originSec + j * self.sampleInterval)
+            if frameIndex >= endFrame:
+                return
+            yield frameIndex
+            j += 1
+
+    def _bucketSec(self, k):
+        sec = self.originSec + k * self.outputInterval
+        return int(sec) if float(sec).is_integer() else round(sec, 6)
+
+    def _flush(self, k, codes, margins, indicators):
+        codes = np.array(codes)
+        # Достоверность интервала - средняя по выборкам наименьшая достоверность цифр
+        confidence = float(Interrupt.confidence(codes, np.array(margins)).min(axis=-1, initial=1).mean())
+        # Индикатор считается горящим, если горел в большинстве выборок интервала
+        indicators = np.array(indicators).reshape(len(codes), -1).mean(axis=0) > 0.5
+
+        if self.incremental and (codes == self._lastCodes).all() and (indicators == self._lastIndicators).all():
+            self.currentSecScan = self._bucketSec(k)
+            self._store(self._lastValue, confidence)
+            return
+
+        started = self.profiler.now()
+        exact, digits, errors = Interrupt.findBatch(codes)
+        self.lastReading = {'codes': codes[-1], 'digits': digits[-1], 'errors': errors[-1],
+                            'unit': self.compiled.unit(indicators)}
+
+        if self.profiler.enabled:
+            self.profiler.count('misreads', int((~exact).sum()))
+            self.profiler.count('brokenEvents', sum(not d.is_broken and broken
+                                                    for d, broken in zip(self.digits, (~exact[-1]).tolist())))
+
+        for d, broken in zip(self.digits, (~exact[-1]).tolist()):
+            d.is_broken = broken
+
+        self.currentSecScan = self._bucketSec(k)
+        data = self.aggregate(digits, exact, self.compiled.powers)
+        data = float(self.compiled.decode(data, indicators, self.decimalPoint)) if indicators.size \
+            else data / (10 ** self.decimalPoint)
+        self.profiler.stage('interpret', started)
+
+        if self.incremental:
+            self._lastCodes = codes[-1] if (codes == codes[-1]).all() else None
+            self._lastIndicators = indicators
+            self._lastValue = data
+
+        self._store(data, confidence)
+
+    def _store(self, data, confidence=1.0):
+        rejected = False
+        if self.filter is not None:
+            data, confidence, rejected = self.filter.push(self.currentSecScan, data, confidence)
+            if rejected:
+                self.profiler.count('rejected')
+        if self.lastReading is not None:
+            self.lastReading['confidence'] = confidence
+            self.lastReading['rejected'] = rejected
+
+        print(f'{self.currentSecScan}-{data}' + (' (rejected)' if rejected else ''))
+        if self._sampledAt is not None:
+            self.profiler.latency(self._sampledAt)
+
+        # При потоковом экспорте в памяти хранятся только отрезки инкрементального режима
+        if self.sink is not None:
+            started = self.profiler.now()
+            self.sink.write(self.currentSecScan, data, self.lastReading)
+            self.profiler.stage('export', started)
+        if self.sink is None or self.incremental:
+            self.global_scan_data[self.currentSecScan] = data
+
+        # Контрольная точка сохраняется после записи значения в файл экспорта
+        if self.checkpoint is not None and self.checkpoint.due():
+            self.checkpoint.save(self.currentSecScan + self.outputInterval, self)
+
+    def scan(self):
+        for _ in self.steps():
+            pass
+        return self.global_scan_data
+
+    def steps(self):
+        # Сканирование по интервалам вывода: после каждого сохранённого значения генератор возвращает его
+        # секунду, и MultiScanner чередует интервалы нескольких видео в общем пуле потоков
+        k = math.floor((self.currentSecScan - self.originSec) / self.outputInterval + 1e-9)
+        bucketEnd = self._source.frameIndex(self._bucketSec(k + 1))
+        codes = []
+        margins = []
+        indicators = []
+
+        # Источник и окно предпросмотра закрываются и при прерывании: поток предварительного
+        # декодирования не должен оставаться внутри OpenCV при выходе из интерпретатора
+        try:
+            self._source.prefetch(self._frames())
+            for i, frameIndex in enumerate(self._frames()):
+                ret, frame = self._source.read(frameIndex)
+                readAt = self.profiler.now()
+                if not ret:
+                    # Нечитаемый первый кадр - ошибка источника, а не конец видео
+                    if not i:
+                        raise RuntimeError(f'{self.path}: cannot read frame {frameIndex} ({self._source.name})')
+                    break
+
+                while frameIndex >= bucketEnd:
+                    if codes:
+                        self._flush(k, codes, margins, indicators)
+                        codes = []
+                        margins = []
+                        indicators = []
+                        yield self.currentSecScan
+                    k += 1
+                    bucketEnd = self._source.frameIndex(self._bucketSec(k + 1))
+
+                started = self.profiler.now()
+                self.scan_data = self.compiled.sample(frame)
+                codes.append(Interrupt.pack(self.scan_data))
+                margins.append(self.compiled.digitMargins)
+                indicators.append(self.compiled.indicatorStates)
+                self._sampledAt = readAt
+                self.profiler.stage('sample', started)
+                self.profiler.count('framesSampled')
+                self.profiler.tick()
+
+                if self.preview is not None:
+                    self.preview.offer(frame, self.scan_data)
+
+            if codes:
+                self._flush(k, codes, margins, indicators)
+                yield self.currentSecScan
+        finally:
+            self._source.release()
+            if self.preview is not None:
+                self.preview.close()
+
+        print('Done')
+        self.profiler.report(final=True)
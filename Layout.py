@@ -0,0 +1,85 @@
+import json
+
+
+class Layout:
+    def __init__(self, cropping=None, rotate=0, digits=None, indicators=None):
+        self.cropping = cropping
+        self.rotate = rotate
+        # Для каждой цифры список пар (имя сегмента, позиция в исходном кадре)
+        self.digits = digits if digits is not None else []
+        # Необязательные одиночные сегменты: словари с видом kind и позицией pos в исходном кадре.
+        # 'dp' - десятичная точка, decimals - число знаков после неё; 'minus' - знак минус;
+        # 'unit' - единица измерения с именем name и множителем значения factor (по умолчанию 1)
+        self.indicators = indicators if indicators is not None else []
+
+    @staticmethod
+    def fromScanner(video):
+        digits = [[(seg.name, seg.pos) for seg in d.segments] for d in video.digits]
+        return Layout(video.cropping, video.rotate, digits, list(getattr(video, 'indicators', [])))
+
+    @staticmethod
+    def load(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            return Layout.fromDict(json.load(file))
+
+    @staticmethod
+    def fromDict(raw):
+        # VideoScanner (и вместе с ним OpenCV) загружается только при чтении разметки
+        from VideoScanner import SN
+
+        cropping = raw.get('cropping')
+        if cropping is not None:
+            cropping = tuple(tuple(p) for p in cropping)
+
+        digits = [[(SN[seg['name']], tuple(seg['pos'])) for seg in d] for d in raw['digits']]
+        indicators = [{**ind, 'pos': tuple(ind['pos'])} for ind in raw.get('indicators', [])]
+        return Layout(cropping, raw.get('rotate', 0), digits, indicators)
+
+    def toDict(self):
+        return {
+            'cropping': self.cropping,
+            'rotate': self.rotate,
+            'digits': [[{'name': name.name, 'pos': list(pos)} for name, pos in d] for d in self.digits],
+            'indicators': [{**ind, 'pos': list(ind['pos'])} for ind in self.indicators]
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.toDict(), file, indent=2)
+
+    def shifted(self, dx, dy):
+        # Та же разметка, сдвинутая на (dx, dy) пикселей исходного кадра
+        cropping = None
+        if self.cropping is not None:
+            cropping = tuple((x + dx, y + dy) for x, y in self.cropping)
+        digits = [[(name, (x + dx, y + dy)) for name, (x, y) in d] for d in self.digits]
+        indicators = [{**ind, 'pos': (ind['pos'][0] + dx, ind['pos'][1] + dy)} for ind in self.indicators]
+        return Layout(cropping, self.rotate, digits, indicators)
+
+    def bounds(self):
+        # Прямоугольник (x0, y0, x1, y1), охватывающий все сегменты и индикаторы
+        positions = [pos for d in self.digits for _, pos in d] + [ind['pos'] for ind in self.indicators]
+        xs, ys = zip(*positions)
+        return min(xs), min(ys), max(xs) + 1, max(ys) + 1
+
+    def build(self, owner):
+        from VideoScanner import Segment, Digit
+
+        digits = []
+        for d in self.digits:
+            digit = Digit(owner)
+            for name, pos in d:
+                seg = Segment(tuple(pos), owner)
+                seg.name = name
+                seg.setDigit(digit)
+            digit.sort()
+            digits.append(digit)
+        return digits
+
+    def apply(self, video):
+        video.cropping = self.cropping
+        video.croppingHistory = [self.cropping] if self.cropping is not None else []
+        video.rotate = self.rotate
+        video.digits = self.build(video)
+        video.indicators = list(self.indicators)
+        video.segmentsHistory = [seg for d in video.digits for seg in d.segments]
@@ -0,0 +1,147 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+from Layout import Layout
+
+
+def dHash(gray):
+    # 64-битный перцептивный отпечаток: знаки разностей соседних пикселей уменьшенного до 9×8 изображения
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), 'big')
+
+
+class LayoutStore:
+    # Папка с разметками неподвижных камер. Для каждой разметки хранится отпечаток области вокруг
+    # сегментов на первом кадре (область вдвое шире и выше сегментов, сами сегменты в отпечаток
+    # не входят) и сама эта область для выравнивания.
+    # Для нового видео область каждой разметки ищется в пределах searchRadius пикселей (как ручная правка
+    # в fixing()); подходит разметка, отпечаток которой на найденном месте отличается не более чем на maxDistance бит.
+
+    def __init__(self, path='Layouts', maxDistance=10, searchRadius=32, minScore=0.5):
+        self.path = path
+        self.maxDistance = maxDistance
+        self.searchRadius = searchRadius
+        self.minScore = minScore
+        self.indexPath = os.path.join(path, 'index.json')
+
+    @staticmethod
+    def fromConfig(config):
+        path = config.get('LayoutStore', 'path', fallback='')
+        if not path:
+            return None
+        return LayoutStore(path,
+                           config.getint('LayoutStore', 'maxDistance', fallback=10),
+                           config.getint('LayoutStore', 'searchRadius', fallback=32))
+
+    def _entries(self):
+        if not os.path.exists(self.indexPath):
+            return []
+        with open(self.indexPath, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def _saveEntries(self, entries):
+        with open(self.indexPath, 'w', encoding='utf-8') as file:
+            json.dump(entries, file, indent=2)
+
+    @staticmethod
+    def _region(layout, shape):
+        x0, y0, x1, y1 = layout.bounds()
+        width, height = x1 - x0, y1 - y0
+        return (max(x0 - width // 2, 0), max(y0 - height // 2, 0),
+                min(x1 + width // 2, shape[1]), min(y1 + height // 2, shape[0]))
+
+    @staticmethod
+    def _gray(frame):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+    @staticmethod
+    def _fingerprint(gray, region, bounds):
+        # Отпечаток области без самого индикатора: показания разных видео не должны влиять на него
+        x0, y0, x1, y1 = region
+        crop = gray[y0:y1, x0:x1].copy()
+        bx0, by0, bx1, by1 = bounds
+        inside = np.zeros(crop.shape, bool)
+        inside[max(by0 - y0, 0):max(by1 - y0, 0), max(bx0 - x0, 0):max(bx1 - x0, 0)] = True
+        if not inside.all():
+            crop[inside] = crop[~inside].mean()
+        return dHash(crop)
+
+    def _padded(self, gray):
+        # Кадр, дополненный на searchRadius пикселей повтором краёв: область, сдвинутая камерой
+        # к краю кадра (или записанная у края), выравнивается и сравнивается целиком
+        r = self.searchRadius
+        return cv2.copyMakeBorder(gray, r, r, r, r, cv2.BORDER_REPLICATE)
+
+    def _distance(self, entry, padded, dx=0, dy=0):
+        r = self.searchRadius
+        x0, y0, x1, y1 = (c + r for c in entry['region'])
+        bx0, by0, bx1, by1 = (c + r for c in entry['bounds'])
+        fingerprint = self._fingerprint(padded, (x0 + dx, y0 + dy, x1 + dx, y1 + dy),
+                                        (bx0 + dx, by0 + dy, bx1 + dx, by1 + dy))
+        return bin(int(entry['hash'], 16) ^ fingerprint).count('1')
+
+    def _match(self, entries, gray):
+        # Ближайшая по отпечатку запись: (расстояние, запись, сдвиг). Сдвиг камеры меняет отпечаток,
+        # поэтому область каждой записи сначала выравнивается, а отпечаток сравнивается на найденном месте
+        padded = self._padded(gray)
+        best = None
+        for entry in entries:
+            shift, score = self.align(self._reference(entry), padded, entry['region'])
+            if score < self.minScore:
+                continue
+            distance = self._distance(entry, padded, *shift)
+            if distance <= self.maxDistance and (best is None or distance < best[0]):
+                best = distance, entry, shift
+        return best
+
+    def _reference(self, entry):
+        return cv2.imread(os.path.join(self.path, entry['key'] + '.png'), cv2.IMREAD_GRAYSCALE)
+
+    def align(self, reference, padded, region):
+        # Сдвиг (dx, dy) области reference относительно её места region в кадре (не дальше searchRadius)
+        # и оценка совпадения; padded - кадр из _padded()
+        x0, y0, x1, y1 = region
+        r = self.searchRadius
+        search = padded[y0:y1 + 2 * r, x0:x1 + 2 * r]
+        if search.shape[0] < reference.shape[0] or search.shape[1] < reference.shape[1]:
+            # Кадр другого размера: область записи в него не помещается
+            return (0, 0), -1
+
+        scores = cv2.matchTemplate(search, reference, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (bx, by) = cv2.minMaxLoc(scores)
+        return (bx - r, by - r), score
+
+    def find(self, frame):
+        # Сохранённая разметка, выровненная по кадру, или None
+        match = self._match(self._entries(), self._gray(frame))
+        if match is None:
+            return None
+        distance, entry, (dx, dy) = match
+
+        print(f"LayoutStore: {entry['key']} matched (distance {distance}), shifted by ({dx}, {dy})")
+        return Layout.load(os.path.join(self.path, entry['key'] + '.json')).shifted(dx, dy)
+
+    def add(self, layout, frame):
+        # Сохраняет разметку; запись с совпадающим отпечатком заменяется (исправленная разметка той же камеры)
+        gray = self._gray(frame)
+        region = self._region(layout, gray.shape)
+        bounds = layout.bounds()
+        x0, y0, x1, y1 = region
+        key = f'{self._fingerprint(gray, region, bounds):016x}'
+
+        entries = self._entries()
+        match = self._match(entries, gray)
+        if match is not None:
+            entries.remove(match[1])
+            for extension in ('.json', '.png'):
+                os.remove(os.path.join(self.path, match[1]['key'] + extension))
+
+        os.makedirs(self.path, exist_ok=True)
+        layout.save(os.path.join(self.path, key + '.json'))
+        cv2.imwrite(os.path.join(self.path, key + '.png'), gray[y0:y1, x0:x1])
+        entries.append({'key': key, 'hash': key, 'region': [int(c) for c in region],
+                        'bounds': [int(c) for c in bounds]})
+        self._saveEntries(entries)
@@ -0,0 +1,77 @@
+import math
+import time
+
+from FrameSource import LiveFrameSource
+from HeadlessScanner import HeadlessScanner
+from VideoScanner import Interrupt
+
+
+class LiveScanner(HeadlessScanner):
+    # Сканирование камеры или потока по сохранённой разметке.
+    # Значения выводятся с настоящим временем (секунды Unix) по интервалам outputInterval;
+    # задержка ограничена очередью LiveFrameSource, отстающие кадры выбрасываются.
+
+    def __init__(self, config, layout, duration=None, profiler=None):
+        super().__init__(config, layout, profiler=profiler, source=LiveFrameSource.fromConfig(config))
+        self.originSec = 0
+        self.duration = duration
+        self.latency = 0
+
+    def scan(self):
+        stopAt = time.time() + self.duration if self.duration else float('inf')
+        k = None
+        lastSample = 0
+        codes = []
+        margins = []
+        indicators = []
+
+        try:
+            while time.time() < stopAt:
+                ret, timestamp, frame = self._source.next(timeout=1)
+                readAt = self.profiler.now()
+                if not ret:
+                    if self._source._finished:
+                        break
+                    continue
+
+                if timestamp - lastSample < self.sampleInterval:
+                    continue
+                lastSample = timestamp
+
+                bucket = math.floor(timestamp / self.outputInterval)
+                if bucket != k:
+                    if codes:
+                        self._flush(k, codes, margins, indicators)
+                        codes = []
+                        margins = []
+                        indicators = []
+                    k = bucket
+
+                started = self.profiler.now()
+                self.scan_data = self.compiled.sample(frame)
+                codes.append(Interrupt.pack(self.scan_data))
+                margins.append(self.compiled.digitMargins)
+                indicators.append(self.compiled.indicatorStates)
+                self._sampledAt = readAt
+                self.profiler.stage('sample', started)
+                self.profiler.count('framesSampled')
+                self.profiler.tick()
+
+                if self.preview is not None:
+                    self.preview.offer(frame, self.scan_data)
+
+                self.latency = time.time() - timestamp
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Поток чтения камеры и окно предпросмотра закрываются при любом выходе из цикла
+            self._source.release()
+            if self.preview is not None:
+                self.preview.close()
+
+        if codes:
+            self._flush(k, codes, margins, indicators)
+
+        print(f'Done (dropped {self._source.dropped} frames)')
+        self.profiler.report(final=True)
+        return self.global_scan_data
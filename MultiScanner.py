@@ -0,0 +1,111 @@
+import configparser
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from HeadlessScanner import HeadlessScanner
+from Layout import Layout
+from Profiler import Profiler
+
+
+class MultiScanner:
+    # Несколько видео одного эксперимента (разные камеры) в одном процессе. Конфигурация читается один раз,
+    # интервалы вывода всех видео выполняются потоками общего пула (OpenCV отпускает GIL при декодировании),
+    # результаты сводятся в одну таблицу: время и по столбцу на каждый индикатор.
+    # displays - список (путь к видео, разметка) или (путь к видео, разметка, имя столбца, сдвиг в секундах);
+    # сдвиг прибавляется к времени видео, чтобы совместить камеры, включённые в разное время.
+
+    def __init__(self, config, displays, workers=None):
+        self.config = config
+        self.outputInterval = config.getfloat('Scan', 'outputInterval', fallback=1)
+        self.workers = workers or config.getint('Multi', 'workers', fallback=os.cpu_count())
+
+        self.names = []
+        self.offsets = []
+        self.scanners = []
+        for i, (videoPath, layout, *rest) in enumerate(displays):
+            name = rest[0] if rest else os.path.splitext(os.path.basename(videoPath))[0]
+            if name in self.names:
+                name = f'{name}-{i}'
+            self.names.append(name)
+            self.offsets.append(rest[1] if len(rest) > 1 else 0)
+
+            displayConfig = self.displayConfig(videoPath)
+            self.scanners.append(HeadlessScanner(displayConfig, layout,
+                                                 profiler=Profiler.fromConfig(displayConfig, name)))
+
+    @staticmethod
+    def fromConfig(config):
+        # [Multi] displays - по строке на индикатор: путь к видео; путь к разметке[; имя[; сдвиг]]
+        displays = []
+        for line in config['Multi']['displays'].strip().splitlines():
+            videoPath, layoutPath, *rest = [part.strip() for part in line.split(';')]
+            name = rest[0] if rest else os.path.splitext(os.path.basename(videoPath))[0]
+            displays.append((videoPath, Layout.load(layoutPath), name, float(rest[1]) if len(rest) > 1 else 0))
+        return MultiScanner(config, displays)
+
+    def displayConfig(self, videoPath):
+        config = configparser.ConfigParser()
+        config.read_dict(self.config)
+        config['Video']['videoPath'] = videoPath
+        # Окна предпросмотра из потоков пула не открываются
+        if config.has_section('Scan'):
+            config['Scan']['previewRate'] = '0'
+        return config
+
+    def _key(self, sec):
+        # Половина интервала округляется вверх (round() округлял бы к чётному и сводил соседние секунды вместе)
+        sec = math.floor(sec / self.outputInterval + 0.5) * self.outputInterval
+        return int(sec) if float(sec).is_integer() else round(sec, 6)
+
+    def _column(self, name, offset, data):
+        column = {}
+        collisions = 0
+        for sec, value in data.items():
+            key = self._key(sec + offset)
+            if key in column:
+                collisions += 1
+                continue
+            column[key] = value
+        if collisions:
+            print(f'MultiScanner: {name}: {collisions} readings fell into an occupied interval and were skipped')
+        return column
+
+    def scan(self):
+        # Задача пула - один интервал вывода одного видео (HeadlessScanner.steps()). У каждого видео в пуле
+        # не больше одной задачи, поэтому состояние сканера не делится между потоками; следующий интервал
+        # ставится в конец очереди, когда выполнен предыдущий, и при workers меньше числа видео
+        # камеры сканируются вперемешку
+        steps = [scanner.steps() for scanner in self.scanners]
+        try:
+            with ThreadPoolExecutor(self.workers) as pool:
+                pending = {pool.submit(next, step, None): step for step in steps}
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        step = pending.pop(future)
+                        if future.result() is not None:
+                            pending[pool.submit(next, step, None)] = step
+        finally:
+            # При ошибке одного видео источники остальных закрываются
+            for step in steps:
+                step.close()
+
+        # Время каждого видео со сдвигом приводится к общей сетке интервалов вывода
+        columns = [self._column(name, offset, scanner.global_scan_data)
+                   for name, offset, scanner in zip(self.names, self.offsets, self.scanners)]
+        times = sorted(set().union(*columns))
+        return [(sec, *[column.get(sec) for column in columns]) for sec in times]
+
+    def export(self, rows, fileName):
+        with open(fileName + '.csv', 'w', encoding='utf-8') as file:
+            file.write(','.join(['sec'] + self.names) + '\n')
+            for sec, *values in rows:
+                file.write(','.join([str(sec)] + ['' if v is None else str(v) for v in values]) + '\n')
+
+
+if __name__ == '__main__':
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    multi = MultiScanner.fromConfig(config)
+    multi.export(multi.scan(), config['Export']['exportFileName'])
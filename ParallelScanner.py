@@ -0,0 +1,58 @@
+import configparser
+import math
+import multiprocessing
+
+from FrameSource import FrameSource
+from HeadlessScanner import HeadlessScanner
+from Profiler import Profiler
+
+
+def _scanShard(task):
+    rawConfig, layout, startSec, endSec, shard = task
+
+    config = configparser.ConfigParser()
+    config.read_dict(rawConfig)
+    if shard:
+        # Окно предпросмотра показывает только первый отрезок
+        config['Scan']['previewRate'] = '0'
+    profiler = Profiler.fromConfig(config, f'shard{shard}')
+    return HeadlessScanner(config, layout, startSec, endSec, profiler).scan()
+
+
+class ParallelScanner:
+    # Видео делится на непрерывные отрезки, каждый сканируется в отдельном процессе
+
+    def __init__(self, config, layout):
+        self.config = config
+        self.layout = layout
+        self.workers = config.getint('Scan', 'workers', fallback=1)
+
+        source = FrameSource(config['Video']['videoPath'])
+        self.fps = source.fps
+        self.totalFrameCount = source.totalFrameCount
+        source.release()
+
+        self.startSec = int(config['Video']['startSec'])
+        self.endSec = int(self.totalFrameCount / self.fps) + 1
+        self.outputInterval = config.getfloat('Scan', 'outputInterval', fallback=1)
+
+    def shards(self):
+        # Границы отрезков совпадают с границами интервалов вывода
+        buckets = math.ceil((self.endSec - self.startSec) / self.outputInterval)
+        bounds = [self.startSec + (buckets * i // self.workers) * self.outputInterval for i in range(self.workers)]
+        bounds.append(self.endSec)
+        return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+    def scan(self):
+        rawConfig = {section: dict(self.config[section]) for section in self.config.sections()}
+        tasks = [(rawConfig, self.layout, a, b, i) for i, (a, b) in enumerate(self.shards())]
+
+        with multiprocessing.Pool(len(tasks)) as pool:
+            results = pool.map(_scanShard, tasks)
+
+        data = results[0]
+        for shard in results[1:]:
+            data.update(shard)
+
+        print('Done')
+        return data
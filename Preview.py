@@ -0,0 +1,51 @@
+import threading
+import time
+
+import cv2
+
+
+class Preview:
+    # Окно с последним распознанным кадром, которое перерисовывается отдельным потоком не чаще rate раз в секунду.
+    # Сканирование не ждёт окно: offer() копирует кадр, только когда подошло время следующей перерисовки,
+    # а пропущенные кадры просто не показываются.
+
+    def __init__(self, compiled, rate=5, title='Preview'):
+        self.compiled = compiled
+        self.interval = 1 / rate
+        self.title = title
+        self._due = 0
+        self._latest = None
+        self._available = threading.Event()
+        self._running = True
+
+        self._thread = threading.Thread(target=self._show, daemon=True)
+        self._thread.start()
+
+    def offer(self, frame, states):
+        now = time.monotonic()
+        if now < self._due:
+            return
+        self._due = now + self.interval
+
+        # Буфер кадра переиспользуется источником, поэтому окну отдаётся копия
+        self._latest = frame.copy(), states.copy()
+        self._available.set()
+
+    def _show(self):
+        while self._running:
+            if not self._available.wait(0.1):
+                cv2.waitKey(1)
+                continue
+            self._available.clear()
+            frame, states = self._latest
+
+            for x, y, on in zip(self.compiled.xs.ravel(), self.compiled.ys.ravel(), states.ravel()):
+                cv2.circle(frame, (int(x), int(y)), 3, (0, 0, 255) if on else (0, 255, 0), -1)
+            cv2.imshow(self.title, frame)
+            cv2.waitKey(1)
+
+        cv2.destroyWindow(self.title)
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=1)
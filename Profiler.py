@@ -0,0 +1,101 @@
+import json
+import os
+import time
+
+
+class NullProfiler:
+    # Выключенный профилировщик: все методы ничего не делают
+
+    enabled = False
+
+    def now(self):
+        return 0
+
+    def stage(self, name, started):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def latency(self, started):
+        pass
+
+    def tick(self):
+        pass
+
+    def report(self, final=False):
+        pass
+
+
+class Profiler(NullProfiler):
+    # Время по этапам сканирования и счётчики событий
+    # Использование: started = profiler.now(); ...; profiler.stage('decode', started)
+
+    enabled = True
+
+    def __init__(self, reportInterval=30, reportPath=''):
+        self.reportInterval = reportInterval
+        self.reportPath = reportPath
+        self.times = {}
+        self.counters = {}
+        self.latencies = {'count': 0, 'total': 0, 'max': 0}
+        self._start = time.perf_counter()
+        self._lastReport = self._start
+
+    @staticmethod
+    def fromConfig(config, suffix=''):
+        if not config.getboolean('Profile', 'enabled', fallback=False):
+            return NullProfiler()
+
+        reportPath = config.get('Profile', 'reportPath', fallback='')
+        if reportPath and suffix:
+            root, extension = os.path.splitext(reportPath)
+            reportPath = f'{root}.{suffix}{extension}'
+        return Profiler(config.getfloat('Profile', 'reportInterval', fallback=30), reportPath)
+
+    def now(self):
+        return time.perf_counter()
+
+    def stage(self, name, started):
+        self.times[name] = self.times.get(name, 0) + time.perf_counter() - started
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def latency(self, started):
+        # Задержка показания: от получения последнего кадра интервала (started) до выдачи значения
+        delay = time.perf_counter() - started
+        self.latencies['count'] += 1
+        self.latencies['total'] += delay
+        self.latencies['max'] = max(self.latencies['max'], delay)
+
+    def tick(self):
+        if self.reportInterval > 0 and time.perf_counter() - self._lastReport >= self.reportInterval:
+            self.report()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._start
+        return {
+            'elapsed': elapsed,
+            'decodedFps': self.counters.get('framesDecoded', 0) / elapsed if elapsed else 0,
+            'sampledFps': self.counters.get('framesSampled', 0) / elapsed if elapsed else 0,
+            'stages': dict(self.times),
+            'counters': dict(self.counters),
+            'latency': self.latencies['total'] / self.latencies['count'] if self.latencies['count'] else 0,
+            'latencyMax': self.latencies['max']
+        }
+
+    def report(self, final=False):
+        self._lastReport = time.perf_counter()
+        summary = self.summary()
+
+        stages = ', '.join(f'{name} {100 * t / summary["elapsed"]:.1f}%' for name, t in
+                           sorted(self.times.items(), key=lambda item: -item[1]))
+        counters = ', '.join(f'{name} {n}' for name, n in self.counters.items())
+        latency = f', latency {1000 * summary["latency"]:.1f} ms' if self.latencies['count'] else ''
+        print(f'[profile] {summary["elapsed"]:.1f} s, {summary["decodedFps"]:.1f} decoded fps, '
+              f'{summary["sampledFps"]:.1f} sampled fps{latency} | {stages} | {counters}')
+
+        if final and self.reportPath:
+            with open(self.reportPath, 'w', encoding='utf-8') as file:
+                json.dump(summary, file, indent=2)
@@ -0,0 +1,58 @@
+import collections
+
+import numpy as np
+
+
+class ReadingFilter:
+    # Потоковый фильтр показаний. Отбрасываются показания с достоверностью ниже minConfidence,
+    # отличающиеся от медианы последних window принятых больше чем на maxJump или
+    # меняющиеся быстрее maxRate единиц в секунду. Вместо отброшенного показания выводится
+    # последнее принятое с достоверностью 0. Если подряд отброшено window показаний,
+    # скачок считается настоящим и фильтр начинает заново с текущего значения.
+
+    def __init__(self, minConfidence=0, window=5, maxJump=0, maxRate=0):
+        self.minConfidence = minConfidence
+        self.window = window
+        self.maxJump = maxJump
+        self.maxRate = maxRate
+        self._history = collections.deque(maxlen=max(window, 1))
+        self._lastSec = None
+        self._rejectedInRow = 0
+
+    @staticmethod
+    def fromConfig(config):
+        reading = ReadingFilter(config.getfloat('Filter', 'minConfidence', fallback=0),
+                                config.getint('Filter', 'window', fallback=5),
+                                config.getfloat('Filter', 'maxJump', fallback=0),
+                                config.getfloat('Filter', 'maxRate', fallback=0))
+        return reading if reading.enabled else None
+
+    @property
+    def enabled(self):
+        return bool(self.minConfidence or self.maxJump or self.maxRate)
+
+    def _plausible(self, sec, value, confidence):
+        if confidence < self.minConfidence:
+            return False
+        if not self._history:
+            return True
+        if self.maxJump and abs(value - np.median(self._history)) > self.maxJump:
+            return False
+        if self.maxRate and abs(value - self._history[-1]) > self.maxRate * abs(sec - self._lastSec):
+            return False
+        return True
+
+    def push(self, sec, value, confidence):
+        # Возвращает (значение, достоверность, отброшено ли показание)
+        if self._plausible(sec, value, confidence) or self._rejectedInRow >= self.window:
+            if self._rejectedInRow >= self.window:
+                self._history.clear()
+            self._rejectedInRow = 0
+            self._history.append(value)
+            self._lastSec = sec
+            return value, confidence, False
+
+        self._rejectedInRow += 1
+        if not self._history:
+            return value, 0.0, True
+        return self._history[-1], 0.0, True
@@ -0,0 +1,61 @@
+import bisect
+from collections.abc import Mapping
+
+
+class Spans(Mapping):
+    # Показания, хранящиеся отрезками (начало, конец, значение) одинаковых значений.
+    # Снаружи выглядит как словарь {секунда: значение} с шагом step между ключами,
+    # ключи разворачиваются только при обращении к ним.
+
+    def __init__(self, step=1):
+        self.step = step
+        self.starts = []
+        self.ends = []
+        self.spanValues = []
+
+    def _key(self, sec):
+        return int(sec) if float(sec).is_integer() else round(sec, 6)
+
+    def _count(self, i):
+        return round((self.ends[i] - self.starts[i]) / self.step) + 1
+
+    def addSpan(self, start, end, value):
+        if self.spanValues and self.spanValues[-1] == value and round((start - self.ends[-1]) / self.step) == 1:
+            self.ends[-1] = end
+        else:
+            self.starts.append(start)
+            self.ends.append(end)
+            self.spanValues.append(value)
+
+    def __setitem__(self, sec, value):
+        # Ключи должны добавляться по возрастанию
+        self.addSpan(sec, sec, value)
+
+    def __getitem__(self, sec):
+        i = bisect.bisect_right(self.starts, sec) - 1
+        if i < 0 or sec > self.ends[i]:
+            raise KeyError(sec)
+
+        offset = (sec - self.starts[i]) / self.step
+        if abs(offset - round(offset)) > 1e-6:
+            raise KeyError(sec)
+        return self.spanValues[i]
+
+    def __iter__(self):
+        for i, start in enumerate(self.starts):
+            for j in range(self._count(i)):
+                yield self._key(start + j * self.step)
+
+    def __len__(self):
+        return sum(self._count(i) for i in range(len(self.starts)))
+
+    def spans(self):
+        return list(zip(self.starts, self.ends, self.spanValues))
+
+    def update(self, other):
+        if isinstance(other, Spans):
+            for start, end, value in other.spans():
+                self.addSpan(start, end, value)
+        else:
+            for sec, value in other.items():
+                self[sec] = value
@@ -0,0 +1,52 @@
+import numpy as np
+
+from VideoScanner import Segment
+
+
+class AdaptiveThreshold:
+    # Пороги включения для каждого сегмента: уровни "включён"/"выключен" определяются
+    # по первым calibrationFrames кадрам и затем плавно подстраиваются под освещение
+
+    def __init__(self, shape, calibrationFrames=25, rate=0.02):
+        self.on = np.full(shape, Segment.onColor, dtype=np.float64)
+        self.off = np.full(shape, Segment.offColor, dtype=np.float64)
+        self.calibrationFrames = calibrationFrames
+        self.rate = rate
+        self._calibration = []
+
+    def classify(self, colors):
+        states = np.abs(colors - self.on) < np.abs(colors - self.off)
+
+        if len(self._calibration) < self.calibrationFrames:
+            self._calibration.append(colors)
+            if len(self._calibration) == self.calibrationFrames:
+                self.calibrate(np.array(self._calibration))
+            return states
+
+        # Сработавший уровень приближается к текущему цвету, второй сдвигается на ту же величину
+        delta = self.rate * (colors - np.where(states, self.on, self.off))
+        self.on += delta
+        self.off += delta
+        return states
+
+    def calibrate(self, samples):
+        # Общие уровни - два кластера по всем сегментам и кадрам. Начальные уровни берутся из самих
+        # выборок: при тусклой или яркой съёмке оба уровня могут лежать по одну сторону от середины
+        # между Segment.onColor и offColor
+        on, off = np.percentile(samples, (5, 95))
+        for _ in range(10):
+            isOn = np.abs(samples - on) < np.abs(samples - off)
+            if isOn.all() or not isOn.any():
+                break
+            on, off = samples[isOn].mean(), samples[~isOn].mean()
+
+        # Уровни сегмента - средние его кадров в каждом кластере (если сегмент не менял состояние,
+        # недостающий уровень берётся общим со сдвигом на ту же величину)
+        isOn = np.abs(samples - on) < np.abs(samples - off)
+        onCount = isOn.sum(axis=0)
+        offCount = len(samples) - onCount
+        onMean = np.where(isOn, samples, 0).sum(axis=0) / np.maximum(onCount, 1)
+        offMean = np.where(isOn, 0, samples).sum(axis=0) / np.maximum(offCount, 1)
+
+        self.on = np.where(onCount > 0, onMean, offMean - (off - on))
+        self.off = np.where(offCount > 0, offMean, onMean + (off - on))
@@ -3,6 +3,11 @@ from enum import Enum, auto
 import cv2
 import numpy as np
 
+from FrameCache import RenderCache, ThumbnailIndex
+from FrameSource import StreamingFrameSource
+from Profiler import Profiler
+from ReadingFilter import ReadingFilter
+
 
 class SetterState(Enum):
     Transforming = auto()
@@ -16,8 +21,10 @@ class VideoScanner:
     def __init__(self, config):
         self.config = config
         self.path = config['Video']['videoPath']
-        self._capture = cv2.VideoCapture(self.path)
-        self.fps = self._capture.get(5)
+        self.profiler = Profiler.fromConfig(config)
+        self._source = None
+        self.fps = None
+        self.totalFrameCount = None
         self.cropping = None
         self.croppingHistory = []
         self.croppingArea = [(), ()]
@@ -27,6 +34,8 @@ class VideoScanner:
         self.scaleF = 1
         self.rotate = 0
         self.digits = []
+        # Индикаторы точки, знака и единиц измерения (Layout.indicators), задаются в файле разметки
+        self.indicators = []
         self.noNamedSegments = []
         self.segmentsHistory = []
         self.nameHistory = []
@@ -35,14 +44,37 @@ class VideoScanner:
         self.error_count = 0
         self.selection = []
         self.decimalPoint = int(self.config['Video']['decimalPoint'])
-        self.totalFrameCount = self._capture.get(cv2.CAP_PROP_FRAME_COUNT)
         self.global_scan_data = {}
+        self.sink = None
+        self.checkpoint = None
+        self.compiled = None
+        self.lastReading = None
+        self.filter = ReadingFilter.fromConfig(config)
 
         self.currentSecScan = int(self.config['Video']['startSec'])
-        self._capture.set(1, round(self.fps * self.currentSecScan, 1))
         self.scan_data = []
+        self.source_img = None
+        self._loadedSec = None  # Секунда, кадр которой лежит в source_img
+
+        # Подготовленные для показа кадры: клавиши и щелчки перерисовывают только разметку поверх них.
+        # При настройке разметки видео листается по миниатюрам (viewSec - показываемая секунда)
+        self.renderCache = RenderCache(config.getint('Editor', 'cacheSize', fallback=16))
+        self.thumbnailInterval = config.getfloat('Editor', 'thumbnailInterval', fallback=1)
+        self.thumbnails = None
+        self.viewSec = None
+        self._mouseCallback = False
+
+    def _open(self):
+        # Видео открывается, а первый кадр декодируется только перед первым показом или сканированием
+        if self._source is not None:
+            return
+        self._source = StreamingFrameSource.fromConfig(self.config)
+        self._source.profiler = self.profiler
+        self.fps = self._source.fps
+        self.totalFrameCount = self._source.totalFrameCount
 
-        _, self.source_img = self._capture.read()
+        _, self.source_img = self._source.read(self._source.frameIndex(self.currentSecScan))
+        self._loadedSec = self.currentSecScan
         self.frame = self.source_img.copy()
 
         self.sizeY, self.sizeX, _ = self.frame.shape
@@ -51,34 +83,41 @@ class VideoScanner:
 
     def set(self):
         self.showFrame()
-        cv2.setMouseCallback('Frame', self.onClick)
 
         self.transform()
         self.placement()
         self.naming()
 
-    def _scale(self):
-        self.sizeY, self.sizeX, _ = self.frame.shape
-        self.ratio = self.sizeY / self.sizeX
-        if self.sizeX > 900 or self.sizeY > 900:
-            self.frame = cv2.resize(self.frame, (round(900 / self.ratio), 900))
-            self.scaleF = 900 / self.sizeY
+    def _displaySize(self):
+        # Масштаб и размер показа обрезанной области исходного кадра
+        height, width = self.source_img.shape[:2]
+        if self.cropping is not None:
+            (x0, y0), (x1, y1) = self.cropping
+            width, height = min(x1, width) - x0, min(y1, height) - y0
 
-        elif self.sizeX < 600 or self.sizeY < 600:
-            self.frame = cv2.resize(self.frame, (round(600 / self.ratio), 600))
-            self.scaleF = 600 / self.sizeY
+        self.ratio = height / width
+        if width > 900 or height > 900:
+            return 900 / height, (round(900 / self.ratio), 900)
+        elif width < 600 or height < 600:
+            return 600 / height, (round(600 / self.ratio), 600)
+        return 1, (width, height)
 
-        else:
-            self.scaleF = 1
+    def _scale(self):
+        self.scaleF, size = self._displaySize()
+        if self.scaleF != 1:
+            self.frame = cv2.resize(self.frame, size)
 
     def _rotate(self):
-        self.frame = np.ascontiguousarray(np.rot90(self.frame, self.rotate), dtype=np.uint8)
+        if self.rotate:
+            self.frame = cv2.rotate(self.frame, (cv2.ROTATE_90_COUNTERCLOCKWISE,
+                                                 cv2.ROTATE_180,
+                                                 cv2.ROTATE_90_CLOCKWISE)[self.rotate - 1])
 
     def _drawSegments(self):
         [seg.draw(self.frame) for seg in self.segmentsHistory]
 
     def _drawPreview(self):
-        if not self.scan_data:
+        if not len(self.scan_data):
             return
         # for d in self.digits:
         #     if d.is_broken:
@@ -93,21 +132,13 @@ class VideoScanner:
             (self.frame.shape[0], round(1.2 * digit_width * len(self.digits) + 1 * block), 3), np.uint8)
         self.previewSize = (self.frame.shape[0], digit_width * len(self.digits))
 
-        segments_positions = [
-            ((1 * block, 0 * block), (4 * block, 1 * block)),
-            ((0 * block, 1 * block), (1 * block, 4 * block)),
-            ((4 * block, 1 * block), (5 * block, 4 * block)),
-            ((1 * block, 4 * block), (4 * block, 5 * block)),
-            ((0 * block, 5 * block), (1 * block, 8 * block)),
-            ((4 * block, 5 * block), (5 * block, 8 * block)),
-            ((1 * block, 8 * block), (4 * block, 9 * block))
-        ]
+        segments_positions = Digit.segmentsPositions(block)
 
         for i, d in enumerate(self.digits):
             main_anchor = np.array([round(digit_width * i * 1.2), 0])
 
             for s in range(7):
-                if list(self.scan_data[i].values())[s]:
+                if self.scan_data[i][s]:
                     cv2.rectangle(digit_display_image,
                                   main_anchor + segments_positions[s][0], main_anchor + segments_positions[s][1],
                                   (255, 255, 255), -1)
@@ -123,28 +154,55 @@ class VideoScanner:
         self.frame = np.concatenate((self.frame, digit_display_image), axis=1, dtype=np.uint8)
 
     def _scan(self, nextFrame=True):
-        self._capture.set(1, round(self.fps * self.currentSecScan, 1))
-        ret, self.source_img = self._capture.read()
+        ret = self._read(self.currentSecScan)
         if ret:
             if nextFrame:
                 self.currentSecScan += 1
 
-            self.scan_data = []
-            scan_interrupt = []
+            if self.compiled is None or not nextFrame:
+                self.compiled = CompiledLayout(self.digits, indicators=self.indicators)
+
+            started = self.profiler.now()
+            self.scan_data = self.compiled.sample(self.source_img)
+            self.profiler.stage('sample', started)
+            self.profiler.count('framesSampled')
 
-            for d in self.digits:
-                scan = d.scan(self.source_img)
-                scan_interrupt.append(scan[0])
-                self.scan_data.append(scan[1])
+            started = self.profiler.now()
+            exact, digits, errors = self.compiled.interpret(self.scan_data)
+            codes = Interrupt.pack(self.scan_data)
+            confidence = float(Interrupt.confidence(codes, self.compiled.digitMargins).min(initial=1))
+            self.lastReading = {'codes': codes, 'digits': digits, 'errors': errors, 'confidence': confidence,
+                                'unit': self.compiled.unit()}
+            self.profiler.stage('interpret', started)
 
             self.error_count = 0
-            for i, res in enumerate(scan_interrupt):
-                if not res[0]:
-                    self.digits[i].is_broken = True
+            for d, broken in zip(self.digits, (~exact).tolist()):
+                if broken:
                     self.error_count += 0
+                    self.profiler.count('misreads')
+                    if not d.is_broken:
+                        self.profiler.count('brokenEvents')
+                d.is_broken = broken
 
             if nextFrame:
-                return int(''.join([str(i[1]) for i in scan_interrupt])) / (10 ** self.decimalPoint)
+                return self.compiled.value(digits, self.decimalPoint)
+
+    def _read(self, sec):
+        # Кадр уже прочитанной секунды повторно не декодируется
+        if sec == self._loadedSec:
+            return True
+        ret, self.source_img = self._source.read(self._source.frameIndex(sec))
+        self._loadedSec = sec if ret else None
+        return ret
+
+    def _scrub(self, key):
+        # Листание видео при настройке разметки: , и . - на шаг миниатюр, [ и ] - на десять шагов
+        step = {44: -1, 46: 1, 91: -10, 93: 10}.get(key)
+        if step is None:
+            return False
+        sec = (self._loadedSec if self.viewSec is None else self.viewSec) + step * self.thumbnailInterval
+        self.viewSec = min(max(sec, 0), (self.totalFrameCount - 1) / self.fps)
+        return True
 
     def transform(self):
 
@@ -165,6 +223,8 @@ class VideoScanner:
                 self.rotate = (self.rotate + 1) % 4
             elif key == -1:
                 quit()
+            elif self._scrub(key):
+                pass
             else:
                 print(key)
 
@@ -185,6 +245,8 @@ class VideoScanner:
                 quit()
             elif key == 8:
                 self.removeLast()
+            elif self._scrub(key):
+                pass
             else:
                 print(key)
 
@@ -216,30 +278,74 @@ class VideoScanner:
             elif key == -1:
                 quit()
 
+            elif self._scrub(key):
+                self.showFrame()
+
     def scan(self):
+        self._open()
 
         cv2.setWindowTitle('Frame', 'Scanning')
 
         self.state = SetterState.Scanning
+        self.viewSec = None
+        if self.thumbnails is not None:
+            self.thumbnails.close()
+            self.thumbnails = None
 
         [dig.sort() for dig in self.digits]
+        self.compiled = CompiledLayout(self.digits, indicators=self.indicators)
+
+        # Кадры следующих секунд декодируются, пока показывается текущий
+        seconds = int(self.totalFrameCount / self.fps - self.currentSecScan) + 1
+        # (уже прочитанная секунда берётся из source_img и в очередь не ставится, иначе первый же кадр
+        #  пришёл бы не по порядку и отключил предварительное декодирование; номера кадров вычисляются сразу,
+        #  пока currentSecScan не изменился)
+        first = 1 if self._loadedSec == self.currentSecScan else 0
+        if first:
+            # Поток декодирует в тот же буфер источника, в котором лежит прочитанный кадр
+            self.source_img = self.source_img.copy()
+        # Источник закрывается и при прерывании: поток предварительного декодирования
+        # не должен оставаться внутри OpenCV при выходе из интерпретатора
+        try:
+            self._source.prefetch([self._source.frameIndex(self.currentSecScan + i) for i in range(first, seconds)])
+
+            while True:
+
+                # Значение хранится под секундой прочитанного кадра, как в HeadlessScanner
+                # (_scan переводит currentSecScan на следующую секунду)
+                sec = self.currentSecScan
+                data = self._scan(True)
+                if self.filter is not None and data is not None:
+                    data, self.lastReading['confidence'], self.lastReading['rejected'] = \
+                        self.filter.push(sec, data, self.lastReading['confidence'])
+                print(f'{sec}-{data}')
+                if self.sink is not None:
+                    self.sink.write(sec, data, self.lastReading)
+                else:
+                    self.global_scan_data[sec] = data
 
-        while True:
+                if self.checkpoint is not None and self.checkpoint.due():
+                    self.checkpoint.save(self.currentSecScan, self)
 
-            data = self._scan(True)
-            print(f'{self.currentSecScan}-{data}')
-            self.global_scan_data[self.currentSecScan] = data
+                started = self.profiler.now()
+                self.showFrame()
+                self.profiler.stage('showFrame', started)
 
-            self.showFrame()
-            key = cv2.waitKey(10 ** self.error_count)
+                started = self.profiler.now()
+                key = cv2.waitKey(10 ** self.error_count)
+                self.profiler.stage('waitKey', started)
+                self.profiler.tick()
 
-            if key == 102:
-                self.fixing()
-                self.state = SetterState.Scanning
+                if key == 102:
+                    self.fixing()
+                    self.state = SetterState.Scanning
 
-            if round(self.fps * (self.currentSecScan + 1), 1) > self.totalFrameCount:
-                print('Done')
-                break
+                if round(self.fps * (self.currentSecScan + 1), 1) > self.totalFrameCount:
+                    print('Done')
+                    self.profiler.report(final=True)
+                    break
+        finally:
+            self._source.release()
 
         return self.global_scan_data
 
@@ -271,18 +377,60 @@ class VideoScanner:
         [s.deselect() for s in self.selection]
 
     def showFrame(self):
-        self.frame = self.source_img.copy()
-
-        self._cropping()
-        self._scale()
-        self._rotate()
-
+        self._open()
+        sec = self._loadedSec if self.viewSec is None else self.viewSec
+        key = sec, self.cropping, self.rotate
+        cached = self.renderCache.get(key)
+        if cached is None:
+            cached = self._render(sec)
+            self.renderCache.put(key, cached)
+        base, self.scaleF = cached
+
+        # Разметка рисуется на копии подготовленного кадра
+        self.frame = base.copy()
         self.sizeY, self.sizeX, _ = self.frame.shape
 
         self._drawSegments()
         self._drawPreview()
 
         cv2.imshow('Frame', self.frame)
+        if not self._mouseCallback:
+            # Щелчки обрабатываются и без ручной настройки (проверка найденной разметки, продолжение
+            # с контрольной точки), поэтому обработчик регистрируется при первом показе окна
+            cv2.setMouseCallback('Frame', self.onClick)
+            self._mouseCallback = True
+
+    def _render(self, sec):
+        # Обрезанный, масштабированный и повёрнутый кадр секунды sec: прочитанный кадр берётся из source_img,
+        # остальные - из миниатюр
+        if sec == self._loadedSec:
+            self.frame = self.source_img
+            self._cropping()
+            self._scale()
+        else:
+            self.scaleF, size = self._displaySize()
+            region = None
+            if self.cropping is not None:
+                (x0, y0), (x1, y1) = self.cropping
+                region = x0, y0, x1, y1
+            if self.thumbnails is None or self.thumbnails.region != region:
+                if self.thumbnails is not None:
+                    self.thumbnails.close()
+                    self.thumbnails = None
+                self.thumbnails = ThumbnailIndex.fromConfig(self.config, region)
+                if self.config.getboolean('Editor', 'precompute', fallback=True):
+                    self.thumbnails.build()
+            thumbnail = self.thumbnails.get(sec)
+            if thumbnail is None:
+                self.frame = np.zeros((size[1], size[0], 3), np.uint8)
+            else:
+                self.frame = cv2.resize(thumbnail, size)
+        self._rotate()
+
+        # Копируется только обрезанная область и только если кадр ещё ссылается на исходный
+        if np.may_share_memory(self.frame, self.source_img):
+            self.frame = self.frame.copy()
+        return self.frame, self.scaleF
 
     def _cropping(self):
         if self.cropping is not None:
@@ -451,7 +599,7 @@ class Segment:
         self.digit = None
 
     def scan(self, frame):
-        color = np.sum(self.getColor(frame, toList=False))
+        color = int(np.sum(self.getColor(frame, toList=False)))
 
         offDif = abs(color - self.offColor)
         onDif = abs(color - self.onColor)
@@ -512,7 +660,7 @@ class Digit:
         self._isSorted = False
 
     def sort(self):
-        self.segments.sort(key=lambda seg: (SN.U, SN.UL, SN.UR, SN.M, SN.BL, SN.BR, SN.B).index(seg.name))
+        self.segments.sort(key=lambda seg: SN.order().index(seg.name))
 
         for segment in self.segments:
             self.sorted[segment.name] = segment
@@ -538,6 +686,19 @@ class Digit:
     def interpret(data):
         return Interrupt.find(data)
 
+    @staticmethod
+    def segmentsPositions(block):
+        # Прямоугольники сегментов цифры шириной 5 и высотой 9 блоков в порядке SN.order()
+        return [
+            ((1 * block, 0 * block), (4 * block, 1 * block)),
+            ((0 * block, 1 * block), (1 * block, 4 * block)),
+            ((4 * block, 1 * block), (5 * block, 4 * block)),
+            ((1 * block, 4 * block), (4 * block, 5 * block)),
+            ((0 * block, 5 * block), (1 * block, 8 * block)),
+            ((4 * block, 5 * block), (5 * block, 8 * block)),
+            ((1 * block, 8 * block), (4 * block, 9 * block))
+        ]
+
     def removeLast(self):
         self.segments.pop(-1)
 
@@ -551,6 +712,131 @@ class Digit:
         return not self.segments
 
 
+class CompiledLayout:
+    # Координаты всех сегментов всех цифр в одном массиве (N цифр × 7 сегментов)
+    # Если задан отступ, координаты считаются от угла области roi, охватывающей все сегменты
+    # patchSize - радиус квадрата вокруг сегмента, по которому усредняется цвет (0 - один пиксель)
+    # threshold - объект с методом classify(colors), иначе используются Segment.onColor/offColor
+    # indicators - дополнительные одиночные сегменты (Layout.indicators): десятичные точки, минус, единицы
+    # измерения. Их координаты идут в том же массиве следом за сегментами цифр и читаются тем же проходом
+
+    def __init__(self, digits, margin=None, patchSize=0, threshold=None, indicators=()):
+        positions = np.array([[seg.pos for seg in d.segments] for d in digits], dtype=np.intp).reshape(-1, 7, 2)
+        extra = np.array([ind['pos'] for ind in indicators], dtype=np.intp).reshape(-1, 2)
+        points = np.concatenate((positions.reshape(-1, 2), extra))
+        self.roi = None
+
+        if margin is not None and points.size:
+            x0, y0 = np.maximum(points.min(axis=0) - margin, 0)
+            x1, y1 = points.max(axis=0) + margin + 1
+            self.roi = int(x0), int(y0), int(x1), int(y1)
+            points = points - (x0, y0)
+
+        self.digitCount = len(positions)
+        self.pointXs = points[:, 0]
+        self.pointYs = points[:, 1]
+        self.powers = 10 ** np.arange(len(positions) - 1, -1, -1, dtype=np.int64)
+        self.patchSize = patchSize
+        self.threshold = threshold
+        self.digitMargins = np.ones(len(positions))
+
+        # Точки: число знаков после запятой для каждой; минусы; единицы: имя и множитель значения
+        kinds = [ind['kind'] for ind in indicators]
+        self.pointIndices = np.array([i for i, kind in enumerate(kinds) if kind == 'dp'], dtype=np.intp)
+        self.pointDecimals = np.array([ind['decimals'] for ind in indicators if ind['kind'] == 'dp'], dtype=np.int64)
+        self.minusIndices = np.array([i for i, kind in enumerate(kinds) if kind == 'minus'], dtype=np.intp)
+        self.unitIndices = np.array([i for i, kind in enumerate(kinds) if kind == 'unit'], dtype=np.intp)
+        self.unitNames = [ind['name'] for ind in indicators if ind['kind'] == 'unit']
+        self.unitFactors = np.array([ind.get('factor', 1) for ind in indicators if ind['kind'] == 'unit'],
+                                    dtype=np.float64)
+        self.indicatorStates = np.zeros(len(indicators), dtype=bool)
+
+    @property
+    def xs(self):
+        return self.pointXs[:self.digitCount * 7].reshape(-1, 7)
+
+    @property
+    def ys(self):
+        return self.pointYs[:self.digitCount * 7].reshape(-1, 7)
+
+    def rescale(self, scale):
+        # Координаты для кадров, уменьшенных источником в 1 / scale раз
+        self.pointXs = np.round(self.pointXs * scale).astype(np.intp)
+        self.pointYs = np.round(self.pointYs * scale).astype(np.intp)
+
+    def measure(self, frame):
+        # Сумма каналов цвета каждой точки (N × 7 сегментов цифр, затем индикаторы); яркость кадра
+        # в оттенках серого умножается на 3, чтобы совпадать по шкале с суммой трёх каналов
+        xs, ys = self.pointXs, self.pointYs
+        if not self.patchSize:
+            if frame.ndim == 2:
+                return frame[ys, xs].astype(np.int32) * 3
+            return frame[ys, xs].sum(axis=-1, dtype=np.int32)
+
+        height, width = frame.shape[:2]
+        x0 = np.clip(xs - self.patchSize, 0, width)
+        x1 = np.clip(xs + self.patchSize + 1, 0, width)
+        y0 = np.clip(ys - self.patchSize, 0, height)
+        y1 = np.clip(ys + self.patchSize + 1, 0, height)
+
+        integral = cv2.integral(frame)
+        sums = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+        if sums.ndim == 2:
+            sums = sums.sum(axis=-1)
+        else:
+            sums = sums * 3
+        return sums / np.maximum((x1 - x0) * (y1 - y0), 1)
+
+    def sample(self, frame):
+        # Состояния сегментов цифр (N × 7); состояния индикаторов сохраняются в indicatorStates
+        colors = self.measure(frame)
+        if self.threshold is not None:
+            states = self.threshold.classify(colors)
+            on, off = self.threshold.on, self.threshold.off
+        else:
+            on, off = Segment.onColor, Segment.offColor
+            states = np.abs(colors - on) < np.abs(colors - off)
+
+        # Запас яркости: расстояние цвета от порога в долях половины разницы уровней (0 - на пороге),
+        # для каждой цифры - наименьший по её сегментам
+        count = self.digitCount * 7
+        margins = np.abs(2 * colors - on - off) / np.maximum(np.abs(np.subtract(off, on)), 1)
+        self.digitMargins = np.minimum(margins[:count], 1).reshape(-1, 7).min(axis=-1, initial=1)
+        self.indicatorStates = states[count:]
+        return states[:count].reshape(-1, 7)
+
+    @staticmethod
+    def interpret(states):
+        return Interrupt.findBatch(Interrupt.pack(states))
+
+    def decode(self, numbers, indicatorStates, decimalPoint):
+        # Значения из чисел, собранных из цифр, и состояний индикаторов (для одной выборки или массива
+        # выборок × индикаторы): горящая точка задаёт число знаков после запятой (если не горит ни одна -
+        # decimalPoint из конфигурации), минус - знак, единицы измерения - множитель
+        states = np.asarray(indicatorStates, dtype=bool)
+        decimals = np.full(states.shape[:-1], decimalPoint, dtype=np.int64)
+        if self.pointIndices.size:
+            lit = states[..., self.pointIndices]
+            decimals = np.where(lit.any(axis=-1), self.pointDecimals[lit.argmax(axis=-1)], decimals)
+        values = numbers / 10.0 ** decimals
+        if self.minusIndices.size:
+            values = np.where(states[..., self.minusIndices].any(axis=-1), -values, values)
+        if self.unitIndices.size:
+            values = values * np.where(states[..., self.unitIndices], self.unitFactors, 1).prod(axis=-1)
+        return values
+
+    def unit(self, indicatorStates=None):
+        # Имена горящих единиц измерения через пробел (None, если не горит ни одна)
+        states = self.indicatorStates if indicatorStates is None else indicatorStates
+        names = [name for name, lit in zip(self.unitNames, np.asarray(states)[self.unitIndices]) if lit]
+        return ' '.join(names) or None
+
+    def value(self, digits, decimalPoint):
+        if not self.indicatorStates.size:
+            return int(digits @ self.powers) / (10 ** decimalPoint)
+        return float(self.decode(int(digits @ self.powers), self.indicatorStates, decimalPoint))
+
+
 class SN(Enum):  # Segment Name
     U = auto()
     UL = auto()
@@ -562,7 +848,11 @@ class SN(Enum):  # Segment Name
 
     @staticmethod
     def getName(i):
-        return (SN.U, SN.UL, SN.UR, SN.M, SN.BL, SN.BR, SN.B)[i % 7]
+        return SN.order()[i % 7]
+
+    @staticmethod
+    def order():
+        return SN.U, SN.UL, SN.UR, SN.M, SN.BL, SN.BR, SN.B
 
 
 class Interrupt:
@@ -577,16 +867,44 @@ class Interrupt:
                {SN.U: True, SN.UL: True, SN.UR: True, SN.M: True, SN.BL: True, SN.BR: True, SN.B: True},  # 8
                {SN.U: True, SN.UL: True, SN.UR: True, SN.M: True, SN.BL: False, SN.BR: True, SN.B: True})  # 9
 
+    @staticmethod
+    def code(data):
+        # Состояния сегментов → 7-битный код (бит i - сегмент SN.order()[i])
+        return sum(1 << i for i, name in enumerate(SN.order()) if data[name])
+
+    @staticmethod
+    def pack(states):
+        return np.packbits(states, axis=-1, bitorder='little')[..., 0]
+
+    @staticmethod
+    def _buildTable():
+        digitCodes = np.array([Interrupt.code(d) for d in Interrupt.dataSet], dtype=np.uint8)
+        diff = np.arange(128, dtype=np.uint8)[:, None] ^ digitCodes[None, :]
+        errors = np.unpackbits(diff[..., None], axis=-1).sum(axis=-1)
+
+        digits = np.argmin(errors, axis=1).astype(np.uint8)
+        error = errors.min(axis=1).astype(np.uint8)
+        # Несовпадения со второй по близости цифрой (для оценки достоверности)
+        secondError = np.sort(errors, axis=1)[:, 1].astype(np.uint8)
+        return digits, error, error == 0, secondError
+
     @staticmethod
     def find(data):
-        if data in Interrupt.dataSet:
-            return True, Interrupt.dataSet.index(data)
-        else:
-            errors = []
-            for number_data in Interrupt.dataSet:
-                error = 0
-                for seg in number_data:
-                    if data[seg] != number_data[seg]:
-                        error += 1
-                errors.append(error)
-            return False, np.argmin(errors)
+        code = Interrupt.code(data)
+        return bool(Interrupt.exactTable[code]), int(Interrupt.digitTable[code])
+
+    @staticmethod
+    def findBatch(codes):
+        return Interrupt.exactTable[codes], Interrupt.digitTable[codes], Interrupt.errorTable[codes]
+
+    @staticmethod
+    def confidence(codes, margins):
+        # Достоверность цифр от 0 до 1: насколько ближайшая цифра ближе второй по числу несовпавших
+        # сегментов (1 - точное совпадение, 0 - две цифры одинаково близки), умноженное на margins -
+        # наименьший запас яркости сегментов цифры (CompiledLayout.digitMargins)
+        errors = Interrupt.errorTable[codes].astype(np.float64)
+        second = Interrupt.secondErrorTable[codes]
+        return (second - errors) / (second + errors) * margins
+
+
+Interrupt.digitTable, Interrupt.errorTable, Interrupt.exactTable, Interrupt.secondErrorTable = Interrupt._buildTable()
@@ -1,5 +1,106 @@
-from App import App
+import argparse
+import configparser
+
+# Каждая команда загружает только нужные ей модули: конвертация и просмотр результатов
+# обходятся без OpenCV и не открывают видео
+
+
+def loadConfig(path):
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config
+
+
+def scan(args):
+    from App import App
+
+    App(loadConfig(args.config), resume=args.resume).run()
+
+
+def export(args):
+    from App import App
+    import Exporters
+
+    config = loadConfig(args.config)
+    if args.format:
+        config['Export']['exportFormat'] = args.format
+    if args.output:
+        config['Export']['exportFileName'] = args.output
+
+    data = Exporters.readResults(args.input, int(config['Video']['startSec']),
+                                 config.getfloat('Scan', 'outputInterval', fallback=1))
+    App(config, data=data).export()
+
+
+def inspect(args):
+    path = args.path
+    if path.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
+        import cv2
+
+        capture = cv2.VideoCapture(path)
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        capture.release()
+        print(f'{path}: {width}x{height}, {fps:g} fps, {int(frames)} frames, {frames / fps if fps else 0:.1f} s')
+        return
+
+    if path.endswith('.json') and not path.endswith('.spans.json'):
+        import json
+
+        with open(path, 'r', encoding='utf-8') as file:
+            raw = json.load(file)
+        indicators = [ind['kind'] for ind in raw.get('indicators', [])]
+        print(f"{path}: layout, {len(raw['digits'])} digits, rotate {raw.get('rotate', 0)}, "
+              f"cropping {raw.get('cropping')}" + (f", indicators {', '.join(indicators)}" if indicators else ''))
+        return
+
+    import Exporters
+
+    data = Exporters.readResults(path)
+    values = [v for v in data.values() if v is not None]
+    if not values:
+        print(f'{path}: empty')
+        return
+    secs = list(data.keys())
+    print(f'{path}: {len(data)} values, {secs[0]}..{secs[-1]} s, min {min(values)}, max {max(values)}')
+
+
+def bench(args):
+    from Benchmark import main
+
+    main(args.arguments)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', default='config.ini')
+    parser.add_argument('--resume', action='store_true', help='continue from the last checkpoint next to the video')
+    commands = parser.add_subparsers(dest='command')
+
+    command = commands.add_parser('scan', help='scan the video from config.ini (default)')
+    command.add_argument('--resume', action='store_true', default=argparse.SUPPRESS,
+                         help='continue from the last checkpoint next to the video')
+    command.set_defaults(handler=scan)
+
+    command = commands.add_parser('export', help='convert a result file to another export format')
+    command.add_argument('input', help='result file (.csv, .jsonl, .txt, .npy, .spans.json, .columns)')
+    command.add_argument('--format', help='export format, as in config.ini (default: exportFormat)')
+    command.add_argument('--output', help='file name without extension (default: exportFileName)')
+    command.set_defaults(handler=export)
+
+    command = commands.add_parser('inspect', help='describe a video, layout or result file')
+    command.add_argument('path')
+    command.set_defaults(handler=inspect)
+
+    command = commands.add_parser('bench', help='run Benchmark.py with the given arguments')
+    command.add_argument('arguments', nargs=argparse.REMAINDER)
+    command.set_defaults(handler=bench)
+
+    args = parser.parse_args(argv)
+    getattr(args, 'handler', scan)(args)
+
 
 if __name__ == '__main__':
-    app = App()
-    app.run()
+    main()
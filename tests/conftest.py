@@ -0,0 +1,26 @@
+import configparser
+import os
+import sys
+
+import pytest
+
+# Модули проекта лежат в корне репозитория
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def config(tmp_path):
+    # config.ini репозитория с видео, разметкой и экспортом во временной папке
+    config = configparser.ConfigParser()
+    config.read(os.path.join(ROOT, 'config.ini'), encoding='utf-8')
+    config['Video']['videoPath'] = str(tmp_path / 'video.avi')
+    config['Video']['startSec'] = '0'
+    config['Video']['decimalPoint'] = '0'
+    config['Video']['layoutPath'] = str(tmp_path / 'layout.json')
+    config['LayoutStore']['path'] = ''
+    config['Scan']['calibrationFrames'] = '0'
+    config['Scan']['checkpointInterval'] = '0'
+    config['Export']['exportFormat'] = 'CSV'
+    config['Export']['exportFileName'] = str(tmp_path / 'out')
+    return config
@@ -0,0 +1,25 @@
+import numpy as np
+
+from Aggregation import AGGREGATIONS
+
+POWERS = np.array([100, 10, 1])
+
+
+def testMajority():
+    digits = np.array([[1, 2, 3], [1, 2, 4], [1, 7, 4], [9, 2, 4]])
+    assert AGGREGATIONS['majority'](digits, np.ones_like(digits, bool), POWERS) == 124
+
+
+def testMedian():
+    digits = np.array([[1, 0, 0], [3, 0, 0], [2, 0, 0]])
+    assert AGGREGATIONS['median'](digits, np.ones_like(digits, bool), POWERS) == 200
+
+
+def testLastStable():
+    digits = np.array([[1, 2, 3], [1, 2, 3], [4, 5, 6], [7, 8, 9]])
+    exact = np.ones_like(digits, bool)
+    assert AGGREGATIONS['last'](digits, exact, POWERS) == 123
+
+    # Устойчивое, но распознанное с ошибкой показание не берётся
+    exact[1, 0] = False
+    assert AGGREGATIONS['last'](digits, exact, POWERS) == 789
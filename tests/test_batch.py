@@ -0,0 +1,35 @@
+import json
+import os
+
+import Batch
+
+
+def makeExperiment(root, name, content):
+    directory = os.path.join(root, name)
+    os.makedirs(directory)
+    with open(os.path.join(directory, 'video.mp4'), 'wb') as file:
+        file.write(content)
+    with open(os.path.join(directory, 'layout.json'), 'w', encoding='utf-8') as file:
+        file.write('{}')
+    return os.path.join(directory, 'video.mp4')
+
+
+def testHashCachedInManifest(config, tmp_path, monkeypatch):
+    # Готовые видео не хешируются повторно, пока не изменится их размер или время изменения
+    root = str(tmp_path / 'Experiments')
+    config['Batch']['experimentsDir'] = root
+    videoPath = makeExperiment(root, 'E-1', b'video')
+    key = Batch.videoHash(videoPath)
+    with open(os.path.join(root, 'manifest.json'), 'w', encoding='utf-8') as file:
+        json.dump({key: {'video': videoPath, 'export': 'out'}}, file)
+
+    hashed = []
+    monkeypatch.setattr(Batch, 'videoHash', lambda path: hashed.append(path) or key)
+    Batch.Batch(config).run()
+    assert hashed == [videoPath]
+    Batch.Batch(config).run()
+    assert hashed == [videoPath]
+
+    os.utime(videoPath, (0, 0))
+    Batch.Batch(config).run()
+    assert hashed == [videoPath, videoPath]
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+
+import Exporters
+from Columnar import ColumnarReader, ColumnarWriter
+
+
+def testColumnarSlice(tmp_path):
+    fileName = os.path.join(tmp_path, 'data')
+    with ColumnarWriter(fileName, flushEvery=3, digitCount=2) as writer:
+        for sec in range(10):
+            digits = np.array([sec % 10, 1], np.uint8)
+            writer.write(sec * 0.5, sec * 10.0, {'codes': digits, 'digits': digits, 'errors': np.zeros(2),
+                                                 'confidence': 1.0})
+
+    reader = ColumnarReader(writer.path)
+    assert len(reader) == 10
+    rows = reader.slice(1, 2.5)
+    assert rows['time'].tolist() == [1.0, 1.5, 2.0]
+    assert rows['value'].tolist() == [20.0, 30.0, 40.0]
+    assert rows['digits'][:, 0].tolist() == [2, 3, 4]
+    assert reader.slice(100)['time'].size == 0
+    assert Exporters.readResults(writer.path) == {sec * 0.5: sec * 10.0 for sec in range(10)}
+
+
+def testColumnarRowsWithoutDetails(tmp_path):
+    # Строки без массивов распознавания (продолжение с контрольной точки) дополняются нулями
+    fileName = os.path.join(tmp_path, 'data')
+    with ColumnarWriter(fileName, digitCount=2) as writer:
+        writer.write(0, 1.0)
+        digits = np.array([3, 4], np.uint8)
+        writer.write(1, 34.0, {'codes': digits, 'digits': digits, 'errors': np.zeros(2), 'confidence': 0.5})
+        with pytest.raises(ValueError):
+            writer.write(2, 5.0, {'codes': digits[:1], 'digits': digits[:1], 'errors': np.zeros(1)})
+
+    reader = ColumnarReader(writer.path)
+    assert reader.meta['digits'] == 2
+    assert len(reader) == 2
+    assert reader['digits'].tolist() == [[0, 0], [3, 4]]
+    assert np.isnan(reader['confidence'][0]) and reader['confidence'][1] == 0.5
+
+
+def testColumnarResume(tmp_path):
+    fileName = os.path.join(tmp_path, 'data')
+    digits = np.array([3, 4], np.uint8)
+    details = {'codes': digits, 'digits': digits, 'errors': np.zeros(2), 'confidence': 1.0}
+    with ColumnarWriter(fileName, flushEvery=1, digitCount=2) as writer:
+        writer.write(0, 34.0, details)
+        state = writer.state()
+        writer.write(1, 0.0, details)
+    with ColumnarWriter(fileName, digitCount=2, resume=state) as writer:
+        writer.write(1, 35.0)
+
+    reader = ColumnarReader(writer.path)
+    assert reader.meta['rows'] == 2
+    assert reader['value'].tolist() == [34.0, 35.0]
+    assert reader['digits'].tolist() == [[3, 4], [0, 0]]
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from VideoScanner import CompiledLayout
+
+INDICATORS = [{'kind': 'dp', 'decimals': 1, 'pos': (0, 0)},
+              {'kind': 'dp', 'decimals': 2, 'pos': (1, 0)},
+              {'kind': 'minus', 'pos': (2, 0)},
+              {'kind': 'unit', 'name': 'k', 'factor': 1000, 'pos': (3, 0)},
+              {'kind': 'unit', 'name': 'V', 'pos': (4, 0)}]
+
+
+@pytest.fixture
+def compiled():
+    return CompiledLayout([], indicators=INDICATORS)
+
+
+@pytest.mark.parametrize('states, expected', [
+    ([0, 0, 0, 0, 0], 1234),
+    ([1, 0, 0, 0, 0], 123.4),
+    ([0, 1, 0, 0, 0], 12.34),
+    ([0, 1, 1, 0, 0], -12.34),
+    ([1, 0, 0, 1, 1], 123400),
+])
+def testDecode(compiled, states, expected):
+    assert compiled.decode(1234, states, 0) == pytest.approx(expected)
+
+
+def testDecodeDefaultsToConfiguredDecimals(compiled):
+    assert compiled.decode(1234, [0, 0, 1, 0, 0], 3) == pytest.approx(-1.234)
+
+
+def testDecodeBatch(compiled):
+    # Массив выборок × индикаторы декодируется одним вызовом
+    numbers = np.array([1234, 1234, 5])
+    states = np.array([[0, 0, 0, 0, 0], [0, 1, 1, 0, 0], [1, 0, 0, 1, 0]])
+    assert compiled.decode(numbers, states, 0) == pytest.approx([1234, -12.34, 500])
+
+
+def testUnit(compiled):
+    assert compiled.unit(np.array([0, 0, 0, 1, 1], bool)) == 'k V'
+    assert compiled.unit(np.zeros(5, bool)) is None
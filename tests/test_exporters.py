@@ -0,0 +1,75 @@
+import os
+import re
+import zipfile
+
+import numpy as np
+import pytest
+
+import Exporters
+
+DATA = {5: 1.5, 6: 2.0, 7: -3.25, 8: 100.0}
+
+
+@pytest.mark.parametrize('sinkClass', [Exporters.CSVSink, Exporters.JSONSink, Exporters.RawTXTSink,
+                                       Exporters.NumpySink])
+def testSinkRoundTrip(tmp_path, sinkClass):
+    fileName = os.path.join(tmp_path, 'data')
+    with sinkClass(fileName, flushEvery=2) as sink:
+        for sec, value in DATA.items():
+            sink.write(sec, value, {'confidence': 0.5})
+    assert Exporters.readResults(sink.path, startSec=5) == DATA
+
+
+def testNumpySinkReadableByNumpy(tmp_path):
+    fileName = os.path.join(tmp_path, 'data')
+    with Exporters.NumpySink(fileName) as sink:
+        for sec, value in DATA.items():
+            sink.write(sec, value)
+    assert np.load(sink.path).tolist() == list(DATA.values())
+
+
+@pytest.mark.parametrize('sinkClass', [Exporters.CSVSink, Exporters.JSONSink, Exporters.RawTXTSink,
+                                       Exporters.NumpySink])
+def testSinkResume(tmp_path, sinkClass):
+    # Строки, сброшенные на диск после контрольной точки, заменяются строками продолжения
+    fileName = os.path.join(tmp_path, 'data')
+    with sinkClass(fileName, flushEvery=1) as sink:
+        sink.write(5, 1.5)
+        sink.write(6, 2.0)
+        state = sink.state()
+        sink.write(7, 0.0)
+    with sinkClass(fileName, flushEvery=1, resume=state) as sink:
+        sink.write(7, -3.25)
+        sink.write(8, 100.0)
+    assert Exporters.readResults(sink.path, startSec=5) == DATA
+
+
+def testSinkResumeChecksFile(tmp_path):
+    fileName = os.path.join(tmp_path, 'data')
+    with Exporters.CSVSink(fileName) as sink:
+        sink.write(5, 1.5)
+        state = sink.state()
+    with pytest.raises(ValueError):
+        Exporters.JSONSink(fileName, resume=state)
+    os.remove(sink.path)
+    with pytest.raises(ValueError):
+        Exporters.CSVSink(fileName, resume=state)
+
+
+def testExcelSinkResume(tmp_path):
+    pytest.importorskip('xlsxwriter')
+    fileName = os.path.join(tmp_path, 'data')
+    sink = Exporters.ExcelSink(fileName)
+    sink.write(5, 1.5)
+    sink.write(6, 2.0)
+    state = sink.state()
+    sink.write(7, 0.0)
+    sink.partial.flush()  # процесс убит: книга не записана, журнал остался
+
+    with Exporters.ExcelSink(fileName, resume=state) as sink:
+        sink.write(7, -3.25)
+        sink.write(8, 100.0)
+    with zipfile.ZipFile(sink.path) as book:
+        sheet = book.read('xl/worksheets/sheet1.xml').decode('utf-8')
+    assert [float(v) for v in re.findall(r'<v>([^<]*)</v>', sheet)] == [n for row in DATA.items() for n in row]
+    assert not os.path.exists(sink.partial.path)
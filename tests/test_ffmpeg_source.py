@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import FrameSource
+from FrameSource import FFmpegFrameSource
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    # Ответы ffprobe: поля потока и контейнера; записываются все вызовы
+    answer = {'stream': {}, 'format': {}, 'calls': []}
+
+    class Result:
+        def __init__(self, stdout):
+            self.stdout = stdout
+
+    def run(command, **kwargs):
+        answer['calls'].append(command)
+        stream = {'width': 1280, 'height': 720, 'r_frame_rate': '30000/1001', **answer['stream']}
+        if '-count_packets' in command:
+            stream = {'nb_read_packets': '600'}
+        return Result(json.dumps({'streams': [stream], 'format': answer['format']}).encode())
+
+    monkeypatch.setattr(FrameSource.subprocess, 'run', run)
+    return answer
+
+
+def testFrameCountFromHeader(probes):
+    probes['stream'] = {'nb_frames': '1234', 'duration': '41.2'}
+    source = FFmpegFrameSource('video.mp4')
+    assert source.totalFrameCount == 1234
+    assert source.size == (1280, 720)
+    assert len(probes['calls']) == 1
+
+
+def testFrameCountFromDuration(probes):
+    # Matroska: числа кадров в заголовке нет, длительность есть только у контейнера
+    probes['format'] = {'duration': '20.020000'}
+    source = FFmpegFrameSource('video.mkv')
+    assert source.totalFrameCount == 600
+    assert not any('-count_packets' in call for call in probes['calls'])
+
+
+def testFrameCountByCounting(probes):
+    probes['stream'] = {'nb_frames': 'N/A', 'duration': 'N/A'}
+    source = FFmpegFrameSource('stream.ts')
+    assert source.totalFrameCount == 600
+    assert '-count_packets' in probes['calls'][-1]
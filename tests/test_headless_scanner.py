@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import Benchmark
+from HeadlessScanner import HeadlessScanner
+from Layout import Layout
+from VideoScanner import Interrupt
+
+FPS = 20
+
+
+@pytest.fixture
+def clip(config):
+    # Показание меняется каждые полсекунды
+    layout, truth = Benchmark.renderSevenSegmentClip(config['Video']['videoPath'], 4, FPS, (320, 240), 2, 'MJPG',
+                                                     holdSec=0.5)
+    return config, layout, truth
+
+
+def scan(config, layout, **options):
+    for name, value in options.items():
+        config['Scan'][name] = str(value)
+    return HeadlessScanner(config, layout).scan()
+
+
+def testSubSecondBuckets(clip):
+    config, layout, truth = clip
+    data = scan(config, layout, sampleInterval=0.25, outputInterval=0.5, aggregation='majority')
+    assert list(data) == [0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5]
+    assert list(data.values()) == [truth[round(sec * FPS)] for sec in data]
+
+
+def testBucketAggregatesSamples(clip):
+    # В секунду попадают четыре выборки двух показаний; last берёт последнее устойчивое
+    config, layout, truth = clip
+    data = scan(config, layout, sampleInterval=0.25, outputInterval=1, aggregation='last')
+    assert list(data) == [0, 1, 2, 3]
+    assert list(data.values()) == [truth[round((sec + 0.75) * FPS)] for sec in data]
+
+
+def testEveryFrame(clip):
+    config, layout, truth = clip
+    data = scan(config, layout, sampleInterval=0, outputInterval=0.5, aggregation='median')
+    assert list(data.values()) == [truth[round(sec * FPS)] for sec in data]
+
+
+def testStartInsideBucket(clip):
+    # Интервалы отсчитываются от startSec конфигурации, а не от места продолжения
+    config, layout, truth = clip
+    config['Scan']['sampleInterval'] = '0.25'
+    data = HeadlessScanner(config, layout, startSec=1.5).scan()
+    assert list(data) == [1, 2, 3]
+    assert data[1] == truth[round(1.75 * FPS)]
+
+
+def testFlushIndicatorMajority(clip):
+    config, layout, _ = clip
+    layout = Layout(layout.cropping, layout.rotate, layout.digits, [{'kind': 'minus', 'pos': (5, 5)}])
+    scanner = HeadlessScanner(config, layout)
+    codes = [[Interrupt.code(Interrupt.dataSet[d]) for d in (1, 2)]] * 3
+    margins = [np.ones(2)] * 3
+
+    scanner._flush(2, codes, margins, [[True], [True], [False]])
+    scanner._flush(3, codes, margins, [[True], [False], [False]])
+    assert scanner.global_scan_data == {2: -12, 3: 12}
+    assert scanner.lastReading['digits'].tolist() == [1, 2]
@@ -0,0 +1,52 @@
+import numpy as np
+
+from VideoScanner import Interrupt, SN
+
+
+def referenceFind(code):
+    # Прежний поиск по словарям Interrupt.dataSet: точное совпадение или цифра с наименьшим
+    # числом несовпавших сегментов (при равенстве - меньшая)
+    states = {name: bool(code >> i & 1) for i, name in enumerate(SN.order())}
+    mismatches = [sum(states[name] != digit[name] for name in SN.order()) for digit in Interrupt.dataSet]
+    best = int(np.argmin(mismatches))
+    return mismatches[best] == 0, best, mismatches[best], sorted(mismatches)[1]
+
+
+def testTablesMatchDataSet():
+    codes = np.arange(128, dtype=np.uint8)
+    exact, digits, errors = Interrupt.findBatch(codes)
+    for code in range(128):
+        isExact, digit, error, second = referenceFind(code)
+        assert bool(exact[code]) == isExact
+        assert int(digits[code]) == digit
+        assert int(errors[code]) == error
+        assert int(Interrupt.secondErrorTable[code]) == second
+
+
+def testFindMatchesBatch():
+    for code in range(128):
+        states = {name: bool(code >> i & 1) for i, name in enumerate(SN.order())}
+        assert Interrupt.find(states) == (bool(Interrupt.exactTable[code]), int(Interrupt.digitTable[code]))
+
+
+def testPackRoundTrip():
+    states = np.array([[digit[name] for name in SN.order()] for digit in Interrupt.dataSet])
+    codes = Interrupt.pack(states)
+    assert codes.tolist() == [Interrupt.code(digit) for digit in Interrupt.dataSet]
+    exact, digits, _ = Interrupt.findBatch(codes)
+    assert exact.all()
+    assert digits.tolist() == list(range(10))
+
+
+def testConfidence():
+    codes = Interrupt.pack(np.array([[Interrupt.dataSet[8][name] for name in SN.order()]]))
+    assert Interrupt.confidence(codes, np.ones(1)).tolist() == [1.0]
+    assert Interrupt.confidence(codes, np.full(1, 0.5)).tolist() == [0.5]
+
+    # Коды на равном расстоянии от двух цифр недостоверны, с одной ошибкой - достоверны частично
+    ambiguous = np.flatnonzero(Interrupt.errorTable == Interrupt.secondErrorTable).astype(np.uint8)
+    assert ambiguous.size
+    assert (Interrupt.confidence(ambiguous, np.ones(ambiguous.size)) == 0).all()
+    oneError = np.flatnonzero((Interrupt.errorTable == 1) & (Interrupt.secondErrorTable > 1)).astype(np.uint8)
+    confidence = Interrupt.confidence(oneError, np.ones(oneError.size))
+    assert ((confidence > 0) & (confidence < 1)).all()
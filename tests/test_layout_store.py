@@ -0,0 +1,48 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import Benchmark
+from LayoutStore import LayoutStore
+
+
+def cameraFrame(tmp_path, seed=0):
+    # Кадр индикатора на неоднородном фоне (у ровного фона отпечаток не зависит от камеры)
+    path = os.path.join(tmp_path, f'clip{seed}.avi')
+    layout, _ = Benchmark.renderSevenSegmentClip(path, 1, 1, (320, 240), 2, 'MJPG')
+    capture = cv2.VideoCapture(path)
+    _, frame = capture.read()
+    capture.release()
+
+    noise = np.random.default_rng(seed).uniform(0, 255, frame.shape[:2]).astype(np.float32)
+    texture = cv2.GaussianBlur(noise, (0, 0), 6)
+    texture = (texture - texture.min()) / np.ptp(texture) * 120
+    return layout, np.clip(frame + texture[..., None], 0, 255).astype(np.uint8)
+
+
+def shift(frame, dx, dy):
+    # Тот же кадр, снятый камерой, сдвинутой на (dx, dy) пикселей
+    matrix = np.float32([[1, 0, dx], [0, 1, dy]])
+    return cv2.warpAffine(frame, matrix, frame.shape[1::-1], borderMode=cv2.BORDER_REPLICATE)
+
+
+@pytest.mark.parametrize('dx, dy', [(0, 0), (4, -4), (6, 0), (8, 0), (12, 0), (-20, 15)])
+def testFindAlignsShiftedCamera(tmp_path, dx, dy):
+    layout, frame = cameraFrame(tmp_path)
+    store = LayoutStore(os.path.join(tmp_path, 'store'))
+    store.add(layout, frame)
+
+    found = store.find(shift(frame, dx, dy))
+    assert found is not None
+    assert found.digits == layout.shifted(dx, dy).digits
+
+
+def testFindRejectsOtherCamera(tmp_path):
+    layout, frame = cameraFrame(tmp_path)
+    store = LayoutStore(os.path.join(tmp_path, 'store'))
+    store.add(layout, frame)
+
+    _, other = cameraFrame(tmp_path, seed=1)
+    assert store.find(other) is None
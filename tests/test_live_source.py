@@ -0,0 +1,54 @@
+import threading
+
+import cv2
+import numpy as np
+
+import FrameSource
+from FrameSource import LiveFrameSource
+
+
+class BlockingCapture:
+    # Захват, чтение которого блокируется до разрешения (как поток RTSP без новых кадров)
+
+    def __init__(self, *args):
+        self.allowed = threading.Event()
+        self.reading = threading.Event()
+        self.released = False
+        self.readAfterRelease = False
+
+    def isOpened(self):
+        return True
+
+    def getBackendName(self):
+        return 'test'
+
+    def get(self, prop):
+        return 25 if prop == cv2.CAP_PROP_FPS else 0
+
+    def read(self):
+        self.readAfterRelease |= self.released
+        self.reading.set()
+        self.allowed.wait()
+        return True, np.zeros((4, 4, 3), np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+def testReleaseWaitsForBlockedRead(monkeypatch):
+    monkeypatch.setattr(FrameSource.cv2, 'VideoCapture', BlockingCapture)
+    source = LiveFrameSource('rtsp://camera')
+    capture = source._capture
+    assert capture.reading.wait(1)
+
+    releasing = threading.Thread(target=source.release)
+    releasing.start()
+    releasing.join(1.5)
+    # Захват не закрывается, пока поток чтения находится внутри read(), сколько бы оно ни длилось
+    assert releasing.is_alive() and not capture.released
+
+    capture.allowed.set()
+    releasing.join(1)
+    assert not releasing.is_alive()
+    assert capture.released and not capture.readAfterRelease
+    assert not source._reader.is_alive()
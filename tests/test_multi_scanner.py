@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+import Benchmark
+from MultiScanner import MultiScanner
+
+FPS = 10
+
+
+@pytest.fixture
+def displays(config, tmp_path):
+    displays = []
+    truths = []
+    for seed in range(3):
+        path = os.path.join(tmp_path, f'camera{seed}.avi')
+        layout, truth = Benchmark.renderSevenSegmentClip(path, 4, FPS, (320, 240), 2, 'MJPG', holdSec=1, seed=seed)
+        displays.append((path, layout, f'camera{seed}', 0))
+        truths.append(truth)
+    return config, displays, truths
+
+
+class RecordingSink:
+    # Порядок, в котором сканеры сохраняют значения
+
+    def __init__(self, order, name):
+        self.order = order
+        self.name = name
+
+    def write(self, sec, value, details=None):
+        self.order.append(self.name)
+
+
+def testColumns(displays):
+    config, displays, truths = displays
+    displays[1] = displays[1][:3] + (2,)
+    rows = MultiScanner(config, displays, workers=2).scan()
+
+    assert [row[0] for row in rows] == [0, 1, 2, 3, 4, 5]
+    assert [row[1] for row in rows] == [truths[0][sec * FPS] for sec in range(4)] + [None, None]
+    assert [row[2] for row in rows] == [None, None] + [truths[1][sec * FPS] for sec in range(4)]
+    assert [row[3] for row in rows] == [truths[2][sec * FPS] for sec in range(4)] + [None, None]
+
+
+def testInterleavesWithFewerWorkers(displays):
+    # Один поток на три камеры: интервалы вывода камер чередуются, а не идут видео за видео
+    # (при последовательном сканировании первая камера успела бы сохранить все четыре значения)
+    config, displays, _ = displays
+    multi = MultiScanner(config, displays, workers=1)
+    order = []
+    for name, scanner in zip(multi.names, multi.scanners):
+        scanner.sink = RecordingSink(order, name)
+    multi.scan()
+    assert sorted(order) == sorted(multi.names * 4)
+    for i in range(1, len(order) + 1):
+        counts = [order[:i].count(name) for name in multi.names]
+        assert max(counts) - min(counts) <= 2
@@ -0,0 +1,13 @@
+import Benchmark
+from HeadlessScanner import HeadlessScanner
+from Profiler import Profiler
+
+
+def testLatencyPerReading(config):
+    layout, _ = Benchmark.renderSevenSegmentClip(config['Video']['videoPath'], 3, 10, (320, 240), 2, 'MJPG')
+    profiler = Profiler(reportInterval=0)
+    HeadlessScanner(config, layout, profiler=profiler).scan()
+
+    summary = profiler.summary()
+    assert profiler.latencies['count'] == 3
+    assert 0 < summary['latency'] <= summary['latencyMax'] < summary['elapsed']
@@ -0,0 +1,27 @@
+import json
+import os
+
+import Exporters
+from Spans import Spans
+
+DATA = {5: 1.5, 6: 2.0, 7: -3.25, 8: 100.0}
+
+
+def testPythonTextFormats(tmp_path):
+    path = os.path.join(tmp_path, 'dict.txt')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(str(DATA))
+    assert Exporters.readResults(path) == DATA
+
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(str(list(DATA.values())))
+    assert Exporters.readResults(path, startSec=5) == DATA
+
+
+def testSpansRoundTrip(tmp_path):
+    spans = Spans(1)
+    spans.update({0: 1, 1: 1, 2: 3})
+    path = os.path.join(tmp_path, 'data.spans.json')
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'step': spans.step, 'spans': spans.spans()}, file)
+    assert dict(Exporters.readResults(path)) == {0: 1, 1: 1, 2: 3}
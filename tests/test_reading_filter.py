@@ -0,0 +1,36 @@
+import configparser
+
+from ReadingFilter import ReadingFilter
+
+
+def testDisabledByDefault():
+    config = configparser.ConfigParser()
+    config.read_dict({'Filter': {'minConfidence': '0', 'maxJump': '0', 'maxRate': '0'}})
+    assert ReadingFilter.fromConfig(config) is None
+
+
+def testLowConfidenceReplacedByLastAccepted():
+    reading = ReadingFilter(minConfidence=0.5)
+    assert reading.push(0, 10, 0.9) == (10, 0.9, False)
+    assert reading.push(1, 99, 0.1) == (10, 0.0, True)
+    assert reading.push(2, 11, 0.8) == (11, 0.8, False)
+
+
+def testJumpRejectedUntilWindowFull():
+    reading = ReadingFilter(window=3, maxJump=5)
+    for sec, value in enumerate([10, 11, 10]):
+        assert not reading.push(sec, value, 1)[2]
+    assert reading.push(3, 100, 1) == (10, 0.0, True)
+
+    # После window отброшенных подряд скачок считается настоящим
+    assert reading.push(4, 100, 1)[2]
+    assert reading.push(5, 100, 1)[2]
+    assert reading.push(6, 100, 1) == (100, 1, False)
+    assert reading.push(7, 101, 1) == (101, 1, False)
+
+
+def testRate():
+    reading = ReadingFilter(maxRate=2)
+    reading.push(0, 0, 1)
+    assert reading.push(1, 3, 1)[2]
+    assert not reading.push(2, 3, 1)[2]
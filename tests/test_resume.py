@@ -0,0 +1,73 @@
+import os
+
+import cv2
+import pytest
+
+import Benchmark
+from App import App
+from Checkpoint import Checkpoint
+from Exporters import readResults
+from VideoScanner import VideoScanner
+
+FPS = 10
+SECONDS = 8
+
+
+@pytest.fixture
+def clip(config):
+    config['Scan']['checkpointInterval'] = '1'
+    layout, truth = Benchmark.renderSevenSegmentClip(config['Video']['videoPath'], SECONDS, FPS, (320, 240), 2,
+                                                     'MJPG', holdSec=1)
+    return config, layout, truth
+
+
+@pytest.fixture
+def noWindows(monkeypatch):
+    # Окна HighGUI не открываются; waitKey прерывает сканирование после заданного числа вызовов
+    calls = {'left': None}
+
+    def waitKey(delay=0):
+        if calls['left'] is not None:
+            calls['left'] -= 1
+            if calls['left'] < 0:
+                raise KeyboardInterrupt
+        return -1
+
+    for name in ('imshow', 'setWindowTitle', 'setMouseCallback'):
+        monkeypatch.setattr(cv2, name, lambda *args: None)
+    monkeypatch.setattr(cv2, 'waitKey', waitKey)
+    monkeypatch.setattr(Checkpoint, 'due', lambda self: True)
+    return calls
+
+
+@pytest.mark.parametrize('exportFormat, extension', [('CSV', '.csv'), ('Columnar', '.columns'),
+                                                      ('NumpyArray', '.npy'), ('PythonDict', '.txt')])
+def testInteractiveToHeadlessResume(clip, noWindows, exportFormat, extension):
+    config, layout, truth = clip
+    config['Export']['exportFormat'] = exportFormat
+
+    # Ручная разметка, прерванная на пятой секунде
+    video = VideoScanner(config)
+    layout.apply(video)
+    Checkpoint(config['Video']['videoPath']).save(0, video)
+    noWindows['left'] = 4
+    with pytest.raises(KeyboardInterrupt):
+        App(config, resume=True).run()
+
+    # В контрольной точке только позиция, разметка и размер файла экспорта
+    state = Checkpoint(config['Video']['videoPath']).load()
+    assert state['position'] == 5
+    assert state['sink']['rows'] == 5
+
+    # Продолжение по сохранённой разметке без окон
+    layout.save(config['Video']['layoutPath'])
+    noWindows['left'] = None
+    app = App(config, resume=True)
+    assert type(app._video).__name__ == 'HeadlessScanner'
+    app.run()
+
+    results = readResults(config['Export']['exportFileName'] + extension)
+    assert list(results) == list(range(SECONDS))
+    assert [results[sec] for sec in range(SECONDS)] == [int(truth[sec * FPS]) for sec in range(SECONDS)]
+    assert not os.path.exists(config['Video']['videoPath'] + '.ckpt')
+    assert not os.path.exists(config['Video']['videoPath'] + '.partial.csv')
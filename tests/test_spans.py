@@ -0,0 +1,30 @@
+from Spans import Spans
+
+
+def testMergesEqualNeighbours():
+    spans = Spans(1)
+    for sec, value in [(0, 1), (1, 1), (2, 1), (3, 2), (5, 2)]:
+        spans[sec] = value
+    assert spans.spans() == [(0, 2, 1), (3, 3, 2), (5, 5, 2)]
+    assert len(spans) == 5
+    assert list(spans) == [0, 1, 2, 3, 5]
+    assert dict(spans) == {0: 1, 1: 1, 2: 1, 3: 2, 5: 2}
+
+
+def testMissingKeys():
+    spans = Spans(0.5)
+    spans.addSpan(1, 2, 7)
+    assert spans[1.5] == 7
+    assert 0.5 not in spans
+    assert 1.25 not in spans
+    assert 2.5 not in spans
+    assert list(spans) == [1, 1.5, 2]
+
+
+def testUpdate():
+    spans = Spans(1)
+    spans.update({0: 'a', 1: 'a'})
+    other = Spans(1)
+    other.addSpan(2, 4, 'a')
+    spans.update(other)
+    assert spans.spans() == [(0, 4, 'a')]
@@ -0,0 +1,43 @@
+import numpy as np
+
+from Threshold import AdaptiveThreshold
+
+# Тусклая съёмка: горящие сегменты около 60, погасшие около 300 (постоянные пороги Segment
+# считают оба уровня горящими)
+ON, OFF = 60.0, 300.0
+
+
+def frames(count, brightness=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    states = rng.integers(0, 2, (count, 14)).astype(bool)
+    states[0], states[1] = True, False
+    colors = np.where(states, ON, OFF) + brightness + rng.normal(0, 5, states.shape)
+    return states, colors
+
+
+def testCalibration():
+    threshold = AdaptiveThreshold(14, calibrationFrames=10)
+    states, colors = frames(30)
+    results = np.array([threshold.classify(c) for c in colors])
+    assert (results[10:] == states[10:]).all()
+    assert np.allclose(threshold.off, OFF, atol=10) and np.allclose(threshold.on, ON, atol=10)
+
+
+def testFollowsLighting():
+    # Освещение медленно растёт на 150 за 300 кадров: уровни подстраиваются
+    threshold = AdaptiveThreshold(14, calibrationFrames=10, rate=0.05)
+    states, colors = frames(300, seed=1)
+    colors += np.linspace(0, 150, len(colors))[:, None]
+    results = np.array([threshold.classify(c) for c in colors])
+    assert (results[10:] == states[10:]).all()
+    assert np.allclose(threshold.off, OFF + 150, atol=15)
+
+
+def testWithoutAdaptation():
+    threshold = AdaptiveThreshold(14, calibrationFrames=10, rate=0)
+    _, colors = frames(10)
+    for c in colors:
+        threshold.classify(c)
+    on, off = threshold.on.copy(), threshold.off.copy()
+    threshold.classify(colors[0] + 50)
+    assert (threshold.on == on).all() and (threshold.off == off).all()